@@ -2,5 +2,12 @@
 pmtk package
 """
 
-import pkg_resources
-pkg_resources.declare_namespace(__name__)
+import sys
+
+# Namespace package. Importing pkg_resources is slow, so only declare the
+# namespace through it if it's already loaded and use pkgutil otherwise.
+if 'pkg_resources' in sys.modules:
+    sys.modules['pkg_resources'].declare_namespace(__name__)
+else:
+    from pkgutil import extend_path
+    __path__ = extend_path(__path__, __name__)
@@ -0,0 +1,40 @@
+"""
+Command line interface: pmtk <command> [<args>]
+"""
+
+import argparse
+import sys
+
+
+def _serve(args):
+    # Import here to keep the startup of other commands fast.
+    from pmtk import server
+    try:
+        server.serve(args.socket, args.files)
+    except server.QueryError as e:
+        sys.exit(str(e))
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='pmtk',
+            description='Project Management Toolkit')
+    commands = parser.add_subparsers(dest='command')
+
+    serve = commands.add_parser('serve',
+            help='keep projects in memory and answer queries about them')
+    serve.add_argument('-s', '--socket', default='pmtk.sock',
+            help='path of the Unix socket to listen on (default: pmtk.sock)')
+    serve.add_argument('files', nargs='+', metavar='FILE',
+            help='PPL files to serve')
+    serve.set_defaults(func=_serve)
+
+    args = parser.parse_args(argv)
+    if getattr(args, 'func', None) is None:
+        parser.error('command is required')
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
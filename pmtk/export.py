@@ -0,0 +1,115 @@
+"""
+Streaming export of the work breakdown as table rows.
+
+Tasks are exported depth first, one row per task, in CSV or JSON Lines
+format. Rows are generated one at a time and written in chunks, so exporting
+doesn't build the whole table in memory (but see the effort column below).
+Available columns:
+
+* path -- absolute path of the task,
+* level -- 1 for top level tasks, 2 for their subtasks and so on,
+* outline -- outline number of the task (e.g. "2.3.1"),
+* id, title, description,
+* properties -- all custom properties (JSON object or empty in CSV),
+* $<name> -- value of the custom property <name>,
+* effort -- effort of the task (estimate or sum of the subtasks).
+
+The effort of a task depends on its whole subtree but its row is written
+before the rows of the subtasks, so if the effort column is requested all
+efforts are calculated in one pass before the export and kept in a dict with
+an entry per task (O(tasks) memory, still much less than the rows).
+"""
+
+import csv
+import json
+
+DEFAULT_COLUMNS = ('path', 'level', 'title', 'description', 'properties',
+        'effort')
+
+CHUNK_SIZE = 1000  # rows per write
+
+
+def _getters(project, columns):
+    """Return the list of functions that get column values from a task."""
+    getters = []
+    for column in columns:
+        if column == 'path':
+            getters.append(lambda task: task.getAbsolutePath())
+        elif column == 'level':
+            getters.append(lambda task: task.getLevel() - 1)
+        elif column == 'outline':
+            getters.append(lambda task: task.getOutlineNumber())
+        elif column in ('id', 'title', 'description'):
+            getters.append(lambda task, column=column: getattr(task, column))
+        elif column == 'properties':
+            getters.append(lambda task: task.getProperties())
+        elif column.startswith('$'):
+            getters.append(lambda task, name=column[1:]:
+                    task.getProperty(name))
+        elif column == 'effort':
+            efforts = project.getEffortRollup()
+            getters.append(efforts.get)
+        else:
+            raise ValueError('Unknown column: %s' % column)
+    return getters
+
+
+def yieldRows(project, columns=DEFAULT_COLUMNS):
+    """Yield a list of column values for each task of the project."""
+    getters = _getters(project, columns)
+    for task in project.getRootTask().yieldDescendants():
+        yield [getter(task) for getter in getters]
+
+
+class _LineBuffer(object):
+    """File-like object that keeps the last written line."""
+
+    def write(self, line):
+        self.line = line
+
+
+def yieldCSV(project, columns=DEFAULT_COLUMNS, header=True):
+    """Yield CSV lines: the header (unless disabled) and a line per task."""
+    buf = _LineBuffer()
+    writer = csv.writer(buf, lineterminator='\n')
+    if header:
+        writer.writerow(columns)
+        yield buf.line
+    json_columns = [i for i, column in enumerate(columns)
+            if column == 'properties']
+    for row in yieldRows(project, columns):
+        for i in json_columns:
+            row[i] = json.dumps(row[i], sort_keys=True) if row[i] else ''
+        writer.writerow(row)
+        yield buf.line
+
+
+def yieldJSONLines(project, columns=DEFAULT_COLUMNS):
+    """Yield a line with JSON object for each task."""
+    for row in yieldRows(project, columns):
+        yield json.dumps(dict(zip(columns, row)), sort_keys=True) + '\n'
+
+
+def writeChunks(lines, stream, chunk_size=CHUNK_SIZE):
+    """Write the lines to the stream, chunk_size lines at a time."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            stream.write(''.join(chunk))
+            chunk = []
+    if chunk:
+        stream.write(''.join(chunk))
+
+
+def exportCSV(project, stream, columns=DEFAULT_COLUMNS, header=True,
+        chunk_size=CHUNK_SIZE):
+    """Write the work breakdown of the project to the stream as CSV."""
+    writeChunks(yieldCSV(project, columns, header), stream, chunk_size)
+
+
+def exportJSONLines(project, stream, columns=DEFAULT_COLUMNS,
+        chunk_size=CHUNK_SIZE):
+    """Write the work breakdown of the project to the stream as JSON Lines.
+    """
+    writeChunks(yieldJSONLines(project, columns), stream, chunk_size)
@@ -2,6 +2,12 @@
 pmtk.model package
 """
 
-import pkg_resources
-pkg_resources.declare_namespace(__name__)
+import sys
+
+# Namespace package (see pmtk/__init__.py).
+if 'pkg_resources' in sys.modules:
+    sys.modules['pkg_resources'].declare_namespace(__name__)
+else:
+    from pkgutil import extend_path
+    __path__ = extend_path(__path__, __name__)
 
@@ -0,0 +1,126 @@
+"""
+Comparison of work breakdown structures.
+
+The trees are compared top down using subtree hashes (see tree module), so
+identical subtrees are skipped without looking inside. Tasks that disappeared
+from one place and appeared in another are reported as moved if they have the
+same id and either the same subtree or the same content. Any task inside of
+the added and removed subtrees can be matched, so a task is found even if it
+moved under a new parent or its old parent was removed.
+"""
+
+
+class TreeDiff(object):
+    """Result of the comparison of two trees.
+
+    All the tasks are represented by their absolute paths:
+      * added -- tasks only present in the new tree,
+      * removed -- tasks only present in the old tree,
+      * moved -- (old path, new path) of the tasks that changed their parent,
+      * modified -- tasks with changed title, description or properties (new
+        path for the moved tasks).
+    """
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.moved = []
+        self.modified = []
+
+    def __repr__(self):
+        return '<TreeDiff +%d -%d ~%d >%d>' % (len(self.added),
+            len(self.removed), len(self.modified), len(self.moved))
+
+    def isEmpty(self):
+        return not (self.added or self.removed or self.moved or self.modified)
+
+
+def _subtree(node):
+    """Return the node and all its descendants depth first."""
+    return [node] + list(node.yieldDescendants())
+
+
+class _Comparison(object):
+
+    def __init__(self):
+        self.result = TreeDiff()
+        self.removed = []  # unmatched tasks of removed subtrees
+        self.added = []  # unmatched tasks of added subtrees
+
+    def compare(self, old, new):
+        """Compare the nodes that are matched to each other."""
+        if old.getHash() == new.getHash():
+            return
+        if old.getContentHash() != new.getContentHash():
+            self.result.modified.append(new.getAbsolutePath())
+        for id, child in old.children.items():
+            if id in new.children:
+                self.compare(child, new.children[id])
+            else:
+                self.removed.extend(_subtree(child))
+        for id, child in new.children.items():
+            if id not in old.children:
+                self.added.extend(_subtree(child))
+
+    def _match(self, key):
+        """Match removed and added tasks with the same key as moved.
+
+        The tasks are tried depth first, so the outermost matches win and the
+        subtrees of the matched tasks are taken out of the unmatched ones.
+        Return the list of matched (old, new) pairs.
+        """
+        removed_by_key = {}
+        for node in self.removed:
+            removed_by_key.setdefault(key(node), []).append(node)
+        claimed = set()
+        matched = []
+        for node in self.added:
+            if id(node) in claimed:
+                continue
+            for candidate in removed_by_key.get(key(node), ()):
+                if id(candidate) not in claimed:
+                    break
+            else:
+                continue
+            matched.append((candidate, node))
+            for n in _subtree(candidate) + _subtree(node):
+                claimed.add(id(n))
+        self.added = [n for n in self.added if id(n) not in claimed]
+        self.removed = [n for n in self.removed if id(n) not in claimed]
+        for old, new in matched:
+            self.result.moved.append((old.getAbsolutePath(),
+                new.getAbsolutePath()))
+        return matched
+
+    def findMoves(self):
+        """Match moved subtrees until there's nothing left to match."""
+        self._match(lambda node: node.getHash())
+        while True:
+            matched = self._match(lambda node: (node.id,
+                node.getContentHash()))
+            if not matched:
+                break
+            for old, new in matched:
+                self.compare(old, new)
+            self._match(lambda node: node.getHash())
+
+    def finish(self):
+        self.result.removed = [n.getAbsolutePath() for n in self.removed]
+        self.result.added = [n.getAbsolutePath() for n in self.added]
+        for paths in (self.result.added, self.result.removed,
+                self.result.moved, self.result.modified):
+            paths.sort()
+        return self.result
+
+
+def diffTrees(old_root, new_root):
+    """Compare two trees of tasks and return TreeDiff."""
+    comparison = _Comparison()
+    comparison.compare(old_root, new_root)
+    comparison.findMoves()
+    return comparison.finish()
+
+
+def diff(project_a, project_b):
+    """Compare work breakdowns of two projects and return TreeDiff."""
+    return diffTrees(project_a.getRootTask(), project_b.getRootTask())
@@ -8,24 +8,58 @@ class EffortEstimatesMixin(object):
 
     def __init__(self):
         super(EffortEstimatesMixin, self).__init__()
-        self.estimates = {}
+        self.estimates = {}  # by task
 
-    def addEstimate(self, task_id, man_hours):
-        """Add effort estimate for the task"""
-        self.estimates[task_id] = man_hours
+    def addEstimate(self, task_path, man_hours):
+        """Add effort estimate for the task
 
-    def getTaskEffort(self, task_id):
+        Estimates are stored by task, so they stay with the task when it's
+        moved. Estimates of the tasks that are removed from the tree are
+        ignored.
+        """
+        task = self.getTask(task_path)
+        self.estimates[task] = man_hours
+
+    def _getEffort(self, task):
+        if task in self.estimates:
+            return self.estimates[task]
+        else:
+            return sum(self._getEffort(subtask) for
+                    subtask in task.listChildren())
+
+    def getTaskEffort(self, task_path):
         """Return or calculate the effort for the task
         
         For tasks with no subtasks and not estimates returns zero.
         """
-        if task_id in self.estimates:
-            return self.estimates[task_id]
-        else:
-            return sum(self.getTaskEffort(subtask_id) for 
-                    subtask_id in self.getSubtaskIds(task_id))
+        return self._getEffort(self.getTask(task_path))
+
+    def getEffortRollup(self, root=None):
+        """Return the efforts of all tasks under root in a dict by task.
+
+        The efforts are calculated in one post-order pass, so it's much faster
+        than calling getTaskEffort for every task. Root defaults to the root
+        task of the work breakdown and is included in the result.
+        """
+        if root is None:
+            root = self.getRootTask()
+        efforts = {}
+        stack = [(root, False)]
+        while stack:
+            task, children_done = stack.pop()
+            if children_done:
+                if task in self.estimates:
+                    efforts[task] = self.estimates[task]
+                else:
+                    efforts[task] = sum(efforts[subtask] for
+                            subtask in task.listChildren())
+            else:
+                stack.append((task, True))
+                stack.extend((subtask, False) for
+                        subtask in task.listChildren())
+        return efforts
 
     def getTotalEffort(self):
         """Get the effort of the root task"""
-        return self.getTaskEffort(self.getBreakdownRoot().id)
+        return self._getEffort(self.getRootTask())
 
@@ -0,0 +1,131 @@
+"""
+Linter for ambiguous and shadowed relative paths.
+
+For every subtree and every short relative path (the last max_length ids of
+the absolute paths) the linter finds the nodes that match the path at the
+smallest level, which is what the navigation from the root of the subtree
+would return (see tree module). It reports:
+
+* ambiguous paths -- several nodes match the path at the smallest level, so
+  navigation from the root of the subtree raises AmbiguousPath,
+* shadowed nodes -- the node matches the path but there's a node with a
+  shorter absolute path matching it in the subtree, so navigation from the
+  root of the subtree doesn't reach the node.
+
+All subtrees are processed in one bottom-up pass. The matches found in the
+children are merged into the biggest child's table, so each entry is moved
+O(log n) times and the whole pass takes O(n log n) for n nodes.
+"""
+
+
+class LintIssue(object):
+    """Ambiguous path or shadowed nodes found by the linter.
+
+    kind is 'ambiguous' or 'shadowed', scope is the root of the smallest
+    subtree in which the problem occurs, path is the relative path, nodes are
+    the ambiguous or the shadowed nodes and shadowing are the nodes that
+    shadow them (None for ambiguous paths).
+    """
+
+    def __init__(self, kind, scope, path, nodes, shadowing=None):
+        self.kind = kind
+        self.scope = scope
+        self.path = path
+        self.nodes = nodes
+        self.shadowing = shadowing
+
+    def __repr__(self):
+        return '<LintIssue %s %s in %s>' % (self.kind, self.path, self.scope)
+
+    def __str__(self):
+        if self.kind == 'ambiguous':
+            return '%s is ambiguous in %s: %s' % (self.path, self.scope,
+                    _describe(self.nodes))
+        else:
+            return '%s in %s is shadowed by %s: %s' % (self.path,
+                    self.scope, _describe(self.shadowing),
+                    _describe(self.nodes))
+
+
+def _describe(nodes):
+    """Return node paths with source locations (if known)."""
+    parts = []
+    for node in sorted(nodes, key=lambda node: node.abs_path):
+        source = getattr(node, 'source', None)
+        if source is None:
+            parts.append(str(node))
+        else:
+            parts.append('%s (%s:%d)' % (node, source[0] or '<stream>',
+                source[1]))
+    return ', '.join(parts)
+
+
+def _postOrder(root):
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if children_done:
+            yield node
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.listChildren())
+
+
+def lintTree(root, max_length=2):
+    """Return the list of LintIssues for the tree under root.
+
+    Relative paths of up to max_length ids are checked.
+    """
+    issues = []
+    tables = {}  # path -> (level, nodes) for the subtrees of pending nodes
+
+    for node in _postOrder(root):
+        # Take the biggest table of the children and collect the entries of
+        # the other tables and the paths of the children themselves.
+        child_tables = [tables.pop(child, {}) for child in node.listChildren()]
+        if not child_tables:
+            continue
+        child_tables.sort(key=len)
+        table = child_tables.pop()
+        incoming = {}  # path -> [(level, nodes)]
+        for child_table in child_tables:
+            for path, entry in child_table.items():
+                incoming.setdefault(path, []).append(entry)
+        for child in node.listChildren():
+            abs_path = child.abs_path
+            level = len(abs_path)
+            for length in range(1, min(max_length, level - 1) + 1):
+                incoming.setdefault(abs_path[-length:], []).append(
+                        (level, [child]))
+
+        for path, entries in incoming.items():
+            if path in table:
+                entries.append(table[path])
+            if len(entries) == 1:  # nothing to compare with
+                table[path] = entries[0]
+                continue
+            level = min(entry[0] for entry in entries)
+            winners = [entry[1] for entry in entries if entry[0] == level]
+            if len(winners) > 1:
+                nodes = [n for nodes in winners for n in nodes]
+                issues.append(LintIssue('ambiguous', node, '.'.join(path),
+                    nodes))
+            else:
+                nodes = winners[0]
+            if len(winners) < len(entries):
+                shadowed = [n for entry in entries if entry[0] > level
+                        for n in entry[1]]
+                issues.append(LintIssue('shadowed', node, '.'.join(path),
+                    shadowed, nodes))
+            table[path] = (level, nodes)
+        tables[node] = table
+
+    issues.sort(key=lambda issue: (issue.scope.abs_path, issue.path,
+        issue.kind))
+    return issues
+
+
+def lintProject(project, max_length=2):
+    """Return the list of LintIssues for the work breakdown of the project.
+    """
+    return lintTree(project.getRootTask(), max_length)
@@ -0,0 +1,188 @@
+"""
+Time-phased effort.
+
+After the tasks are scheduled their effort is distributed over the days of
+the plan. TimePhasedEffort keeps the distribution of each task as a sparse
+list of intervals (first day, day after the last, man-hours per day) and
+calculates per-day effort curves of any subtree.
+
+Curves are calculated from difference arrays: each interval adds its rate at
+its first day and subtracts it after its last day, and the running sum of
+that is the curve. The tasks are numbered depth first, so the intervals of
+any subtree form one contiguous slice of the intervals sorted by task number.
+A curve of a subtree therefore costs O(intervals in the subtree + days)
+instead of O(tasks * days).
+
+If numpy is installed the sums are vectorized and the curves are numpy
+arrays, otherwise they are lists of floats. numpy is only imported when a
+TimePhasedEffort is created.
+"""
+
+import bisect
+
+from . import tree
+
+
+def _importNumpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class TimePhasedEffort(object):
+    """Per-day effort of the tasks of a project.
+
+    Days are numbered from 0 (the first day of the plan) to days - 1.
+    """
+
+    def __init__(self, project, days, use_numpy=True):
+        self.project = project
+        self.days = days
+        self.numpy = _importNumpy() if use_numpy else None
+        self.intervals = {}  # (start, end, man-hours per day) by task
+        self._index = None  # see _prepare
+        self._stamp = None  # (root, tree generation) of the index
+
+    def _getTask(self, task_path):
+        return self.project.getTask(task_path)
+
+    def addInterval(self, task_path, start, end, man_hours=None):
+        """Spread man_hours of the task evenly over days start to end - 1.
+
+        If man_hours is not given the effort of the task is used.
+        """
+        if not 0 <= start < end <= self.days:
+            raise ValueError("Invalid interval: %s - %s" % (start, end))
+        task = self._getTask(task_path)
+        if man_hours is None:
+            man_hours = self.project.getTaskEffort(task.getAbsolutePath())
+        self.intervals.setdefault(task, []).append(
+                (start, end, float(man_hours) / (end - start)))
+        self._index = None
+
+    def setDailyEffort(self, task_path, start, values):
+        """Set per-day effort of the task starting from day start.
+
+        Runs of equal values are stored as one interval.
+        """
+        task = self._getTask(task_path)
+        if not 0 <= start <= start + len(values) <= self.days:
+            raise ValueError("Effort doesn't fit into the plan")
+        intervals = []
+        for i, value in enumerate(values):
+            day = start + i
+            if intervals and intervals[-1][1] == day and \
+                    intervals[-1][2] == value:
+                intervals[-1] = (intervals[-1][0], day + 1, value)
+            elif value:
+                intervals.append((day, day + 1, float(value)))
+        self.intervals[task] = intervals
+        self._index = None
+
+    def _prepare(self):
+        """Number the tasks depth first and sort the intervals by number.
+
+        The index contains for each task the range of numbers of its subtree
+        and the intervals as parallel sequences (owner numbers, starts, ends,
+        rates). It is rebuilt when the intervals or the tree of tasks change
+        (see tree generations in the tree module).
+        """
+        root = self.project.getRootTask()
+        if self._index is not None and self._stamp[0] is root and \
+                root.generation < self._stamp[1]:
+            return self._index
+        self._stamp = (root, tree.newGeneration())
+        ranges = {}
+        stack = []  # (task, level, number) of the tasks with open ranges
+        number = 0
+        for number, task in enumerate([root] +
+                list(root.yieldDescendants())):
+            level = task.getLevel()
+            while stack and stack[-1][1] >= level:
+                done, _, first = stack.pop()
+                ranges[done] = (first, number)
+            stack.append((task, level, number))
+        for done, _, first in stack:
+            ranges[done] = (first, number + 1)
+
+        rows = sorted((ranges[task][0], start, end, rate)
+                for task, intervals in self.intervals.items()
+                if task in ranges
+                for start, end, rate in intervals)
+        owners = [row[0] for row in rows]
+        columns = list(zip(*rows))[1:] if rows else ([], [], [])
+        if self.numpy is not None:
+            columns = [self.numpy.array(c, dtype=t) for c, t in
+                    zip(columns, (int, int, float))]
+        self._index = (ranges, owners, columns)
+        return self._index
+
+    def _curve(self, lo, hi, columns):
+        """Per-day curve of the intervals in the slice lo:hi."""
+        starts, ends, rates = [c[lo:hi] for c in columns]
+        if self.numpy is not None:
+            np = self.numpy
+            diff = np.bincount(starts, weights=rates, minlength=self.days + 1)
+            diff -= np.bincount(ends, weights=rates,
+                    minlength=self.days + 1)
+            return np.cumsum(diff[:self.days])
+        diff = [0.0] * (self.days + 1)
+        for start, end, rate in zip(starts, ends, rates):
+            diff[start] += rate
+            diff[end] -= rate
+        curve = []
+        total = 0.0
+        for delta in diff[:self.days]:
+            total += delta
+            curve.append(total)
+        return curve
+
+    def _cumulative(self, curve):
+        if self.numpy is not None:
+            return self.numpy.cumsum(curve)
+        result = []
+        total = 0.0
+        for value in curve:
+            total += value
+            result.append(total)
+        return result
+
+    def _taskCurve(self, task, cumulative=False):
+        ranges, owners, columns = self._prepare()
+        first, last = ranges[task]
+        lo = bisect.bisect_left(owners, first)
+        hi = bisect.bisect_left(owners, last)
+        curve = self._curve(lo, hi, columns)
+        return self._cumulative(curve) if cumulative else curve
+
+    def getCurve(self, task_path='.', cumulative=False):
+        """Return per-day effort of the task and its subtasks.
+
+        If cumulative is true, return the effort done by the end of each day.
+        """
+        return self._taskCurve(self._getTask(task_path), cumulative)
+
+    def getBurndown(self, task_path='.'):
+        """Return the effort remaining in the subtree at the end of each day.
+        """
+        cumulative = self.getCurve(task_path, cumulative=True)
+        total = cumulative[-1] if len(cumulative) else 0.0
+        if self.numpy is not None:
+            return total - cumulative
+        return [total - done for done in cumulative]
+
+    def getCurves(self, max_depth=None, cumulative=False):
+        """Return the curves of all tasks (up to max_depth) by task.
+
+        The root task is at depth 0 and the top level tasks are at depth 1.
+        """
+        ranges = self._prepare()[0]
+        if max_depth is not None:
+            max_level = self.project.getRootTask().getLevel() + max_depth
+        curves = {}
+        for task in ranges:
+            if max_depth is None or task.getLevel() <= max_level:
+                curves[task] = self._taskCurve(task, cumulative)
+        return curves
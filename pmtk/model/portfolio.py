@@ -0,0 +1,117 @@
+"""
+Portfolio is a container for many projects.
+
+Projects in a portfolio share one pool of strings: ids, titles and property
+names and values of their tasks are replaced with the copies from the pool
+when the project is added. The portfolio also keeps indexes of the tasks of
+all projects by id and by property names, so cross-project queries don't
+need to walk the trees of the projects.
+
+The indexes reflect the projects as they were when they were added. Call
+reindex() after changing the projects.
+"""
+
+from .. import util
+
+
+class Portfolio(util.TitleMixin, object):
+
+    def __init__(self, id=None, title=None):
+        self.id = id
+        self.title = title
+        self.projects = {}  # by project id
+        self.strings = {}  # intern pool
+        self._clearIndexes()
+
+    def _clearIndexes(self):
+        self.tasks_by_id = {}  # task id -> [(project, task)]
+        self.tasks_by_property = {}  # property name -> [(project, task)]
+        self._efforts = {}  # effort rollups by project id
+
+    def intern(self, s):
+        """Return the shared copy of the string."""
+        return self.strings.setdefault(s, s)
+
+    def _indexProject(self, project):
+        for task in project.getRootTask().yieldDescendants():
+            self.tasks_by_id.setdefault(task.id, []).append((project, task))
+            for name in task.getProperties():
+                self.tasks_by_property.setdefault(name, []).append(
+                        (project, task))
+
+    def addProject(self, project):
+        """Add the project, intern its strings and index its tasks.
+
+        Interning replaces the ids in the tree, so it's done with the project
+        locked for writing.
+        """
+        if project.id in self.projects:
+            raise ValueError("Duplicate project id: %s" % project.id)
+        with project.writing():
+            project.id = self.intern(project.id)
+            project.internStrings(self.intern)
+            root = project.getRootTask()
+            root.internIds(self.intern)
+            root.internStrings(self.intern)
+            for task in root.yieldDescendants():
+                task.internStrings(self.intern)
+        self.projects[project.id] = project
+        self._indexProject(project)
+
+    def reindex(self):
+        """Rebuild the indexes after the projects have changed."""
+        self._clearIndexes()
+        for project in self.projects.values():
+            self._indexProject(project)
+
+    def _getEfforts(self, project):
+        if project.id not in self._efforts:
+            self._efforts[project.id] = project.getEffortRollup()
+        return self._efforts[project.id]
+
+    def findTasks(self, path):
+        """Return (project, task) for all tasks in all projects matching path.
+
+        Relative paths match the tasks whose absolute paths end with them
+        (there's no origin to resolve ambiguity, so all matches are returned).
+        Absolute paths are looked up in each project.
+        """
+        if path.startswith('.'):
+            result = []
+            for project_id in sorted(self.projects):
+                project = self.projects[project_id]
+                try:
+                    result.append((project, project.getTask(path)))
+                except LookupError:
+                    pass
+            return result
+        ids = tuple(path.split('.'))
+        return [(project, task) for project, task in
+                self.tasks_by_id.get(ids[-1], [])
+                if task._matchesRelPath(ids)]
+
+    def getEffortByProperty(self, name):
+        """Return the total effort of the tasks by the value of the property.
+
+        Effort is credited to the value of the nearest task with the property
+        (the task itself or above it): the effort of a task with the property
+        is counted under its value and subtracted from the value of the
+        nearest task with the property above it.
+        """
+        totals = {}
+        for project, task in self.tasks_by_property.get(name, []):
+            effort = self._getEfforts(project)[task]
+            value = task.getProperty(name)
+            totals[value] = totals.get(value, 0) + effort
+            parent = task.parent
+            while parent is not None and parent.getProperty(name) is None:
+                parent = parent.parent
+            if parent is not None:
+                value = parent.getProperty(name)
+                totals[value] = totals.get(value, 0) - effort
+        return totals
+
+    def getTotalEffort(self):
+        """Return the sum of total efforts of all projects."""
+        return sum(self._getEfforts(project)[project.getRootTask()]
+                for project in self.projects.values())
@@ -2,11 +2,12 @@
 Project is the container for all other parts of the model
 """
 
-from . import work
+from . import effort, work
 from .. import util
 
 
-class Project(work.WorkBreakdownMixin, util.TitleMixin):
+class Project(work.WorkBreakdownMixin, effort.EffortEstimatesMixin,
+        util.TitleMixin):
 
     def __init__(self, id, title=None):
         super(Project, self).__init__()
@@ -0,0 +1,374 @@
+"""
+Copy-on-write snapshots of the work breakdown for what-if planning.
+
+Snapshot is an immutable version of the task tree. Its nodes (TaskState) don't
+have parent links or absolute paths, so unchanged subtrees are shared between
+all the snapshots derived from each other. Every change returns a new snapshot
+in which only the nodes on the path from the root to the changed node are
+copied, so taking a snapshot is O(1) and a change is O(depth).
+
+Children of a state are kept in a persistent map (ChildMap), so replacing one
+child of a wide task doesn't copy all its siblings either: a change copies
+O(log fanout) small buckets on each level.
+
+Snapshots are addressed by absolute paths ('.', '.a', '.a.b'). For fuzzy
+navigation convert a snapshot back to the tree of tasks with toTask().
+"""
+
+from . import tree, work
+
+_BITS = 5  # bits of key hash used on each level of ChildMap
+_MASK = (1 << _BITS) - 1
+_BUCKET_SIZE = 16  # max entries in a bucket before it's split
+_MAX_SHIFT = 64  # buckets of keys with equal hashes are never split
+
+
+def _splitPath(path):
+    """Convert absolute path into a tuple of ids."""
+    if not path.startswith('.'):
+        raise tree.NavigationError('Absolute path expected: %s' % path)
+    if path == '.':
+        return ()
+    return tuple(path[1:].split('.'))
+
+
+class _Trie(object):
+    """Inner node of ChildMap: sub-tries and buckets by bits of key hash."""
+
+    __slots__ = ('slots',)
+
+    def __init__(self, slots):
+        self.slots = slots
+
+
+def _build(items, shift):
+    """Return trie node for the (key, entry) pairs."""
+    if len(items) <= _BUCKET_SIZE or shift >= _MAX_SHIFT:
+        return dict(items)
+    groups = {}
+    for key, entry in items:
+        groups.setdefault((hash(key) >> shift) & _MASK, []).append(
+                (key, entry))
+    return _Trie(dict((slot, _build(group, shift + _BITS))
+            for slot, group in groups.items()))
+
+
+def _set(node, key, entry, shift):
+    """Return copy of the node with key set to entry."""
+    if isinstance(node, _Trie):
+        slot = (hash(key) >> shift) & _MASK
+        slots = dict(node.slots)
+        slots[slot] = _set(node.slots.get(slot, {}), key, entry,
+                shift + _BITS)
+        return _Trie(slots)
+    bucket = dict(node)
+    bucket[key] = entry
+    if len(bucket) > _BUCKET_SIZE:
+        return _build(list(bucket.items()), shift)
+    return bucket
+
+
+def _remove(node, key, shift):
+    """Return copy of the node without key."""
+    if isinstance(node, _Trie):
+        slot = (hash(key) >> shift) & _MASK
+        slots = dict(node.slots)
+        child = _remove(node.slots[slot], key, shift + _BITS)
+        if child:
+            slots[slot] = child
+        else:
+            del slots[slot]
+        return _Trie(slots)
+    bucket = dict(node)
+    del bucket[key]
+    return bucket
+
+
+def _entries(node):
+    if isinstance(node, _Trie):
+        for child in node.slots.values():
+            for entry in _entries(child):
+                yield entry
+    else:
+        for entry in node.items():
+            yield entry
+
+
+class ChildMap(object):
+    """Persistent mapping of child states by id that keeps insertion order.
+
+    This is a hash trie: keys are distributed into small buckets by the bits
+    of their hashes. set() and remove() return new maps that share everything
+    except the buckets and the trie nodes on the way to the changed key.
+    """
+
+    __slots__ = ('_root', '_len', '_next')
+
+    def __init__(self, items=()):
+        """Make the map out of (key, value) pairs with unique keys."""
+        entries = [(key, (seq, value)) for seq, (key, value) in
+                enumerate(items)]
+        self._root = _build(entries, 0)
+        self._len = len(entries)
+        self._next = len(entries)  # sequence number for the next key
+
+    def _derive(self, root, length, next):
+        result = ChildMap.__new__(ChildMap)
+        result._root = root
+        result._len = length
+        result._next = next
+        return result
+
+    def __len__(self):
+        return self._len
+
+    def _find(self, key):
+        node = self._root
+        shift = 0
+        while isinstance(node, _Trie):
+            node = node.slots.get((hash(key) >> shift) & _MASK, {})
+            shift += _BITS
+        return node.get(key)
+
+    def __getitem__(self, key):
+        entry = self._find(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry[1]
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def get(self, key, default=None):
+        entry = self._find(key)
+        return default if entry is None else entry[1]
+
+    def items(self):
+        """Return the list of (key, value) in insertion order."""
+        return [(key, entry[1]) for key, entry in
+                sorted(_entries(self._root), key=lambda item: item[1][0])]
+
+    def keys(self):
+        return [key for key, value in self.items()]
+
+    def values(self):
+        return [value for key, value in self.items()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def set(self, key, value):
+        """Return new map with key set to value (in place of the old value)."""
+        old = self._find(key)
+        if old is None:
+            return self._derive(_set(self._root, key, (self._next, value), 0),
+                    self._len + 1, self._next + 1)
+        return self._derive(_set(self._root, key, (old[0], value), 0),
+                self._len, self._next)
+
+    def remove(self, key):
+        """Return new map without key."""
+        if key not in self:
+            raise KeyError(key)
+        return self._derive(_remove(self._root, key, 0), self._len - 1,
+                self._next)
+
+
+class TaskState(object):
+    """Immutable state of a task with its subtasks.
+
+    TaskStates are shared between snapshots and must never be modified. Use
+    replace() to make a changed copy.
+    """
+
+    __slots__ = ('id', 'title', 'description', 'properties', 'estimate',
+            'children', '_effort')
+
+    def __init__(self, id='', title=None, description='', properties=None,
+            estimate=None, children=None):
+        self.id = id
+        self.title = title if title is not None else id
+        self.description = description
+        self.properties = properties or {}
+        self.estimate = estimate
+        # direct subtasks by id
+        self.children = children if children is not None else ChildMap()
+        self._effort = None  # memoized effort, valid since we're immutable
+
+    def __repr__(self):
+        return '<TaskState %s>' % self.id
+
+    def replace(self, **changes):
+        """Return a copy of this state with some of the fields changed."""
+        fields = dict((name, getattr(self, name)) for name in
+                ('id', 'title', 'description', 'properties', 'estimate',
+                 'children'))
+        fields.update(changes)
+        return TaskState(**fields)
+
+    def getEffort(self):
+        """Return the estimate or the sum of efforts of the subtasks."""
+        if self._effort is None:
+            if self.estimate is not None:
+                self._effort = self.estimate
+            else:
+                self._effort = sum(child.getEffort()
+                        for child in self.children.values())
+        return self._effort
+
+    @classmethod
+    def fromTask(cls, task, estimates=None):
+        """Make the state out of the task and its subtasks.
+
+        estimates maps absolute paths of the tasks to their estimates.
+        """
+        estimates = estimates or {}
+        children = ChildMap((child.id, cls.fromTask(child, estimates))
+                for child in task.listChildren())
+        return cls(task.id, task.title, task.description,
+                task.getProperties(), estimates.get(task.getAbsolutePath()),
+                children)
+
+    def toTask(self, parent=None):
+        """Make a new task tree with the content of this state."""
+        task = work.Task(self.id, self.title, parent)
+        if self.description:
+            task.description = self.description
+        if self.properties:
+            task.setProperties(**self.properties)
+        for child in self.children.values():
+            child.toTask(task)
+        return task
+
+
+class Snapshot(object):
+    """Immutable version of the work breakdown structure."""
+
+    def __init__(self, root=None):
+        self.root = root if root is not None else TaskState()
+
+    @classmethod
+    def fromTask(cls, root_task, estimates=None):
+        """Make a snapshot of the tree under root_task."""
+        return cls(TaskState.fromTask(root_task, estimates))
+
+    @classmethod
+    def fromProject(cls, project):
+        """Make a snapshot of the work breakdown and the effort estimates.
+
+        Estimates of EffortEstimatesMixin are kept by task, only the ones of
+        the tasks that are still in the work breakdown are included.
+        """
+        root = project.getRootTask()
+        estimates = {}
+        for task, man_hours in getattr(project, 'estimates', {}).items():
+            if task.getRoot() is root:
+                estimates[task.getAbsolutePath()] = man_hours
+        return cls.fromTask(root, estimates)
+
+    def toTask(self):
+        """Return a new (mutable) root task with all the tasks."""
+        return self.root.toTask()
+
+    def _lookup(self, ids):
+        """Return the list of states from the root to the task at ids."""
+        states = [self.root]
+        for i, id in enumerate(ids):
+            try:
+                states.append(states[-1].children[id])
+            except KeyError:
+                raise tree.NonexistentPath('.' + '.'.join(ids[:i + 1]))
+        return states
+
+    def getState(self, path):
+        """Return the state of the task at absolute path."""
+        return self._lookup(_splitPath(path))[-1]
+
+    def hasTask(self, path):
+        try:
+            self.getState(path)
+            return True
+        except tree.NonexistentPath:
+            return False
+
+    def _rebuild(self, ids, states, new_state):
+        """Return snapshot where the task at ids is replaced with new_state.
+
+        states are the states along ids (as returned by _lookup). If
+        new_state is None, the task is removed.
+        """
+        for id, parent in reversed(list(zip(ids, states))):
+            if new_state is None:
+                children = parent.children.remove(id)
+            else:
+                children = parent.children.set(id, new_state)
+            new_state = parent.replace(children=children)
+        return Snapshot(new_state)
+
+    def _change(self, path, **changes):
+        ids = _splitPath(path)
+        states = self._lookup(ids)
+        return self._rebuild(ids, states[:-1], states[-1].replace(**changes))
+
+    def addTask(self, path, title=None, description='', properties=None,
+            estimate=None):
+        """Return snapshot with a new task at path (absolute)."""
+        ids = _splitPath(path)
+        if not ids:
+            raise ValueError("Can't add the root task")
+        parent_ids, new_id = ids[:-1], ids[-1]
+        states = self._lookup(parent_ids)
+        if new_id in states[-1].children:
+            raise ValueError("Duplicate child id: %s" % new_id)
+        new_state = TaskState(new_id, title, description,
+                dict(properties or {}), estimate)
+        return self._rebuild(ids, states, new_state)
+
+    def updateTask(self, path, **changes):
+        """Return snapshot where the task has some of its fields changed.
+
+        Fields that can be changed: title, description, properties, estimate.
+        """
+        for name in changes:
+            if name not in ('title', 'description', 'properties', 'estimate'):
+                raise ValueError("Can't change %s" % name)
+        if 'properties' in changes:  # the state must not share caller's dict
+            changes['properties'] = dict(changes['properties'])
+        return self._change(path, **changes)
+
+    def setProperty(self, path, id, value):
+        """Return snapshot where the task has the property set."""
+        properties = dict(self.getState(path).properties)
+        properties[id] = value
+        return self._change(path, properties=properties)
+
+    def setEstimate(self, path, man_hours):
+        """Return snapshot where the task has a new estimate."""
+        return self._change(path, estimate=man_hours)
+
+    def removeTask(self, path):
+        """Return snapshot without the task and its subtasks."""
+        ids = _splitPath(path)
+        if not ids:
+            raise ValueError("Can't remove the root task")
+        states = self._lookup(ids)
+        return self._rebuild(ids, states[:-1], None)
+
+    def moveTask(self, path, new_parent_path):
+        """Return snapshot where the task is moved under new parent."""
+        ids = _splitPath(path)
+        new_parent_ids = _splitPath(new_parent_path)
+        if new_parent_ids[:len(ids)] == ids:
+            raise ValueError("Can't move %s under itself" % path)
+        state = self.getState(path)
+        new_parent = self.getState(new_parent_path)
+        if state.id in new_parent.children:
+            raise ValueError("Duplicate child id: %s" % state.id)
+        removed = self.removeTask(path)
+        new_ids = new_parent_ids + (state.id,)
+        return removed._rebuild(new_ids, removed._lookup(new_parent_ids),
+                state)
+
+    def getEffort(self, path='.'):
+        """Return the effort of the task at path."""
+        return self.getState(path).getEffort()
@@ -47,8 +47,44 @@ as they are non-ambiguous at least locally (in some subtree containing the
 origin). Additionally when the path is ambiguous in any subtree containing the
 origin, the closest node to the root is returned. This is important to prevent
 nodes close to the root being shadowed by their namesakes deep in the tree.
+
+Order of children and outline numbers
+-------------------------------------
+Children are kept in the order in which they were added and each node knows
+its position among the children of its parent. The positions (counted from 1)
+of a node and its ancestors form its outline number, such as "2.3.1". Adding
+a child or moving it to another parent is O(1), removing a child renumbers
+its younger siblings. Outline numbers are computed and looked up in
+O(depth).
+
+Subtree hashes
+--------------
+Each node has a hash of its content (id for the base Node class) and the
+hashes of its children (a Merkle hash). Identical subtrees have equal hashes
+regardless of their position in the tree. Hashes are computed lazily and
+invalidated along the path to the root when a node changes.
+
+Navigation cache
+----------------
+Results of fuzzy navigation are kept in a bounded LRU cache (see
+NavigationCache). The result of navigation from the origin only depends on
+the subtree of the smallest containing subtree of the origin and the target
+(the whole tree if the path doesn't exist), so each cached result is stamped
+with the generation of that subtree. Adding nodes updates the generations of
+the subtrees above them, so only the results that could change are dropped.
 """
 
+import collections
+import hashlib
+import itertools
+import threading
+import weakref
+
+try:
+    basestring
+except NameError:  # Python 3
+    basestring = str
+
 
 class NavigationError(LookupError):
     """Navigation failed."""
@@ -59,7 +95,10 @@ class NonexistentPath(NavigationError):
 
 
 class AmbiguousPath(NavigationError):
-    """Path matches more than one node."""
+    """Path matches more than one node.
+
+    nodes are the matching nodes in depth-first order.
+    """
 
     def __init__(self, path, nodes=None):
         self.path = path
@@ -73,15 +112,196 @@ class AmbiguousPath(NavigationError):
             return self.path
 
 
+class DuplicateChildren(ValueError):
+    """Nodes can't be attached because their parents have children with the
+    same ids. nodes and paths are the rejected nodes and their would-be
+    absolute paths.
+    """
+
+    def __init__(self, nodes, paths):
+        ValueError.__init__(self,
+                "Duplicate child id: %s" % ', '.join(paths))
+        self.nodes = nodes
+        self.paths = paths
+
+
+# Path epoch: increased when a node with children is attached or detached. Nodes
+# remember the epoch when their absolute path was last checked and check it
+# again if the epoch has changed. The check is just comparing the parent's
+# path with the one this node's path was made from (by identity), so only the
+# nodes under the moved one make new paths, the others only confirm theirs.
+_path_epoch = 0
+_path_epoch_lock = threading.Lock()
+
+# Tree generation: increased every time something computed from the tree (such
+# as a navigation result) is stamped. The nodes remember the generation when
+# something in their subtree last changed.
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def newGeneration():
+    """Increase the tree generation and return it.
+
+    Data computed from a subtree can be stamped with the returned value. It
+    stays valid while the generation of the subtree's root is less than the
+    stamp (that is until the structure of the subtree changes).
+    """
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        return _generation
+
+
+class NavigationCache(object):
+    """Bounded LRU cache of the results of fuzzy navigation.
+
+    Results are keyed by origin node and path. Each result is stamped with the
+    SCST of the origin and the target and is only used while nothing changes
+    in that subtree (see module docstring). The cache only holds weak
+    references to the nodes, so it doesn't keep discarded trees alive; their
+    entries become invalid and eventually fall out of the cache.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def getStats(self):
+        """Return a dictionary with hits, misses and size of the cache."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self.entries)}
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def _lookup(self, key):
+        """Return valid cached (exception class, value) or None."""
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            exc_class, args, refs, origin_path, scope_ref, scope_path, \
+                stamp = entry
+            origin = key[0]()
+            scope = scope_ref()
+            nodes = [ref() for ref in refs]
+            if (origin is None or scope is None or None in nodes or
+                    origin.abs_path is not origin_path or
+                    scope.abs_path is not scope_path or
+                    scope.generation >= stamp):
+                self.misses += 1
+                return None
+            self.entries[key] = entry  # move to the end
+            self.hits += 1
+        if exc_class is None:
+            return (None, nodes[0])
+        elif exc_class is AmbiguousPath:
+            return (AmbiguousPath, args + (nodes,))
+        return (exc_class, args)
+
+    def _store(self, key, exc_class, args, nodes, scope):
+        with self.lock:
+            self.entries[key] = (exc_class, args,
+                    [weakref.ref(node) for node in nodes],
+                    key[0]().abs_path, weakref.ref(scope), scope.abs_path,
+                    newGeneration())
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def navigate(self, origin, path):
+        """Navigate by relative path using the cached results if possible."""
+        key = (weakref.ref(origin), path)
+        result = self._lookup(key)
+        if result is None:
+            try:
+                node = origin._navigateFuzzy(path)
+            except AmbiguousPath as e:
+                result = (AmbiguousPath, (e.path, e.nodes))
+                self._store(key, AmbiguousPath, (e.path,), e.nodes,
+                        _commonAncestor(origin, e.nodes[0]))
+            except NonexistentPath as e:
+                result = (NonexistentPath, e.args)
+                self._store(key, NonexistentPath, e.args, [],
+                        origin.getRoot())
+            else:
+                result = (None, node)
+                self._store(key, None, (), [node],
+                        _commonAncestor(origin, node))
+        exc_class, value = result
+        if exc_class is not None:
+            raise exc_class(*value)
+        return value
+
+
+navigation_cache = NavigationCache()
+
+
+def _commonAncestor(a, b):
+    """Return the root of the smallest subtree containing a and b."""
+    common = 0
+    for x, y in zip(a.abs_path, b.abs_path):
+        if x != y:
+            break
+        common += 1
+    for i in range(len(a.abs_path) - common):
+        a = a.parent
+    return a
+
+
+def attachNodes(nodes):
+    """Attach the nodes to their parents and index them in one pass.
+
+    This is used for bulk loading: the nodes have their parent attribute set
+    but they are not yet added to their parents. Each node must come after its
+    parent in the list (unless the parent is already attached). Nodes with
+    duplicate ids are not attached (and neither are their descendants) and
+    DuplicateChildren listing them is raised after all other nodes are
+    attached.
+    """
+    rejected = set()
+    duplicates = []
+    paths = []
+    for node in nodes:
+        parent = node.parent
+        if parent in rejected:
+            rejected.add(node)
+        elif node.id in parent.children:
+            rejected.add(node)
+            duplicates.append(node)
+            paths.append('.'.join(parent.abs_path + (node.id,)))
+        else:
+            parent._appendChild(node)
+            node._pathChanged()
+            parent._invalidateHash()
+            parent._subtreeChanged()
+    for node in rejected:
+        node.parent = None
+    if duplicates:
+        raise DuplicateChildren(duplicates, paths)
+
+
 class Node(object):
     """Base class for building hierarchies"""
 
     def __init__(self, id='', parent=None):
         self.id = id
         self.parent = None
-        self.abs_path = ('',)  # absolute path as a tuple of ids
+        self._abs_path = ('',)  # see abs_path property
+        self._parent_path = None  # parent's abs_path when _abs_path was made
+        self._path_epoch = _path_epoch
         self.children = {}  # direct subnodes (children) by id
+        self.child_list = []  # children in insertion order
+        self.position = None  # index in parent's child_list
         self.subnodes_index = {}  # unique relative paths of subnodes
+        self._hash = None  # subtree hash, None if not computed
+        self.generation = 0  # of the last change in the subtree
         if parent is not None:
             parent.addChild(self)
 
@@ -91,6 +311,43 @@ class Node(object):
     def __repr__(self):
         return '<Node at %s>' % self.getAbsolutePath()
 
+    def _getAbsPath(self):
+        if self._path_epoch != _path_epoch:
+            if self.parent is None:
+                if self._parent_path is not None:
+                    self._abs_path = ('',)
+                    self._parent_path = None
+            else:
+                parent_path = self.parent.abs_path
+                if parent_path is not self._parent_path:
+                    self._abs_path = parent_path + (self.id,)
+                    self._parent_path = parent_path
+            self._path_epoch = _path_epoch
+        return self._abs_path
+
+    abs_path = property(_getAbsPath,
+            doc='Absolute path as a tuple of ids (computed lazily).')
+
+    def _pathChanged(self):
+        """Update the paths after this node was attached or detached.
+
+        The path of a node without children is just updated. Otherwise the
+        path epoch is increased, so that all paths are checked when they are
+        used next time (see _path_epoch). Either way it doesn't depend on the
+        subtree size.
+        """
+        global _path_epoch
+        if self.children:
+            with _path_epoch_lock:
+                _path_epoch += 1
+        elif self.parent is None:
+            self._abs_path = ('',)
+            self._parent_path = None
+        else:
+            self._parent_path = self.parent.abs_path
+            self._abs_path = self._parent_path + (self.id,)
+            self._path_epoch = _path_epoch
+
     def getAbsolutePath(self):
         """Return absolute path as a string."""
         if self.parent is None:
@@ -98,41 +355,187 @@ class Node(object):
         else:
             return '.'.join(self.abs_path)
 
+    def internIds(self, intern):
+        """Replace the ids in the subtree with their interned copies.
+
+        intern is a function that returns the shared copy of a string. The
+        children indexes and absolute paths are rebuilt with the new ids, so
+        that the old copies are not referenced anymore.
+        """
+        for node in itertools.chain([self], self.yieldDescendants()):
+            # parents come before children, so their paths are rebuilt first
+            node.id = intern(node.id)
+            if node.parent is not None:
+                node._parent_path = node.parent.abs_path
+                node._abs_path = node._parent_path + (node.id,)
+                node._path_epoch = _path_epoch
+            for child in node.child_list:
+                child.id = intern(child.id)
+            node.children = dict((child.id, child)
+                    for child in node.child_list)
+
     def getLevel(self):
         """Return the length of self.abs_path -- level in the tree."""
         return len(self.abs_path)
 
+    def getOutlineNumber(self):
+        """Return the outline number (e.g. "2.3.1"), "" for the root."""
+        numbers = []
+        node = self
+        while node.parent is not None:
+            numbers.append(str(node.position + 1))
+            node = node.parent
+        return '.'.join(reversed(numbers))
+
+    def navigateOutline(self, number):
+        """Return the subnode with outline number relative to this node."""
+        node = self
+        for part in number.split('.') if number else []:
+            try:
+                position = int(part) - 1
+            except ValueError:
+                raise NonexistentPath(number)
+            if not 0 <= position < len(node.child_list):
+                raise NonexistentPath(number)
+            node = node.child_list[position]
+        return node
+
     def listChildren(self):
-        """Return a list of all children of this node."""
-        return self.children.values()
+        """Return a list of all children of this node in insertion order."""
+        return list(self.child_list)
 
     def yieldDescendants(self):
         """Yield all descendants of this node depth first."""
         return self._depthFirstIterator()
 
-    def _readdChildren(self):
-        """Readd all the children to this node.
+    def _structureChanged(self):
+        self._invalidateHash()
+        self._subtreeChanged()
 
-        This is used to update all the indexes when a tree is added as a branch
-        under some other node.
-        """
-        children = self.listChildren()
-        self.children = {}
-        self.subnodes_index = {}
-        for child in children:
-            self.addChild(child)
+    def _appendChild(self, child):
+        self.children[child.id] = child
+        child.position = len(self.child_list)
+        self.child_list.append(child)
 
     def addChild(self, child):
         """Add child node to this node
 
-        If the child contains its own children, all subtree will be reindexed.
+        The paths of the subnodes of the child are updated lazily, so this
+        doesn't depend on the size of the child's subtree.
         """
+        if child.parent is not None:
+            raise ValueError("%s already has a parent" % child.id)
         if child.id in self.children:
             raise ValueError("Duplicate child id: %s" % child.id)
-        self.children[child.id] = child
+        self._appendChild(child)
         child.parent = self
-        child.abs_path = self.abs_path + (child.id,)
-        child._readdChildren()
+        child._pathChanged()
+        self._structureChanged()
+
+    def removeChild(self, child):
+        """Remove child node (or child with given id) and return it.
+
+        The removed node becomes the root of its own tree.
+        """
+        if isinstance(child, basestring):
+            if child not in self.children:
+                raise ValueError("%s is not a child of %s" % (child, self))
+            child = self.children[child]
+        elif self.children.get(child.id) is not child:
+            raise ValueError("%s is not a child of %s" % (child.id, self))
+        del self.children[child.id]
+        del self.child_list[child.position]
+        for i in range(child.position, len(self.child_list)):
+            self.child_list[i].position = i
+        child.position = None
+        child.parent = None
+        child._pathChanged()
+        self._structureChanged()
+        return child
+
+    def detach(self):
+        """Remove this node from its parent (if there is one)."""
+        if self.parent is not None:
+            self.parent.removeChild(self)
+
+    def moveTo(self, new_parent):
+        """Move this node (with its subtree) under new_parent.
+
+        The checks are done against the destination before anything changes:
+        new_parent must not be in the subtree of this node and must not have
+        a child with the same id. In the SCST of this node and new_parent (the
+        subtree of new_parent) the namesakes of this node that are not its
+        siblings are deeper in the tree, so they can't make its id ambiguous.
+        Moving a node to its current parent does nothing.
+        """
+        if new_parent is self.parent:
+            return
+        node = new_parent
+        while node is not None:
+            if node is self:
+                raise ValueError("Can't move %s under itself" % self)
+            node = node.parent
+        if self.id in new_parent.children:
+            raise ValueError("Duplicate child id: %s" % self.id)
+        self.detach()
+        new_parent.addChild(self)
+
+    def _subtreeChanged(self):
+        """Record the change of the structure of the subtree of this node.
+
+        Sets the generation of this node and the nodes above it to current
+        tree generation. If a node already has it, the nodes above it have it
+        too, so we can stop there.
+        """
+        node = self
+        while node is not None and node.generation != _generation:
+            node.generation = _generation
+            node = node.parent
+
+    def _getContent(self):
+        """Return the data that is hashed as the content of this node."""
+        return (self.id,)
+
+    def getContentHash(self):
+        """Return the hash of the content of this node without children."""
+        return hashlib.sha1(repr(self._getContent()).encode('utf-8'))\
+            .hexdigest()
+
+    def _invalidateHash(self):
+        """Forget the hashes of this node and all nodes above it.
+
+        If the hash of a node is known, the hashes of all nodes below it are
+        known too, so we can stop at the first node without a hash.
+        """
+        node = self
+        while node is not None and node._hash is not None:
+            node._hash = None
+            node = node.parent
+
+    def _contentChanged(self):
+        self._invalidateHash()
+
+    def computeHashes(self):
+        """Compute missing hashes in this subtree in one post-order pass."""
+        stack = [(self, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if node._hash is not None:
+                continue
+            if children_done:
+                h = hashlib.sha1(node.getContentHash().encode('ascii'))
+                for id in sorted(node.children):
+                    h.update(node.children[id]._hash.encode('ascii'))
+                node._hash = h.hexdigest()
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.listChildren())
+
+    def getHash(self):
+        """Return the hash of the subtree under this node."""
+        if self._hash is None:
+            self.computeHashes()
+        return self._hash
 
     def _navigateDirect(self, path):
         """Navigate without any smart lookup"""
@@ -158,7 +561,7 @@ class Node(object):
 
     def _depthFirstIterator(self, skip_descent_for=None):
         """Depth first tree iterator"""
-        for child in self.children.values():
+        for child in self.child_list:
             yield child
             if child == skip_descent_for:
                 continue
@@ -174,11 +577,13 @@ class Node(object):
         if len(found) == 1:
             return found[0]
         elif len(found) > 1:
-            found = sorted((n.getLevel(), n) for n in found)
-            if found[0][0] < found[1][0]:
-                return found[0][1]
+            # The sort is stable, so the ties stay in depth-first order.
+            found.sort(key=lambda n: n.getLevel())
+            level = found[0].getLevel()
+            if level < found[1].getLevel():
+                return found[0]
             else:
-                found = [p[1] for p in found if p[0] == found[0][0]]
+                found = [n for n in found if n.getLevel() == level]
                 raise AmbiguousPath(path, found)
         else:
             # nothing found here
@@ -192,7 +597,7 @@ class Node(object):
         if path.startswith('.'):
             return self.getRoot()._navigateDirect(path[1:])
         else:
-            return self._navigateFuzzy(path)
+            return navigation_cache.navigate(self, path)
 
     def getRoot(self):
         """Return the root of the hierarchy"""
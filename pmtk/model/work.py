@@ -2,6 +2,8 @@
 Classes related to work breakdown.
 """
 
+import contextlib
+
 from . import tree
 from .. import util
 
@@ -10,11 +12,33 @@ class Task(tree.Node, util.TitleMixin):
     """Task is a basic element of work."""
 
     command_name = 'Task'  # for reader
+    source = None  # (filename, line number) of the definition (from reader)
 
     def __init__(self, id='', title=None, parent=None):
         tree.Node.__init__(self, id, parent)
         self.title = title
 
+    def _getContent(self):
+        return (self.id, self.title, self.description,
+                sorted(self.getProperties().items()))
+
+    def copy(self, parent=None):
+        """Return a copy of this task and all its subtasks.
+
+        The copy is added under parent if it's given. The subtasks are copied
+        top down so that each of them is indexed only once.
+        """
+        task = self.__class__(self.id, self.title, parent)
+        task.source = self.source
+        if self.description:
+            task.description = self.description
+        properties = self.getProperties()
+        if properties:
+            task.setProperties(**properties)
+        for child in self.listChildren():
+            child.copy(task)
+        return task
+
 
 class WorkBreakdownMixin(object):
     """Container for the work breakdown (to be mixed into Project)."""
@@ -23,15 +47,49 @@ class WorkBreakdownMixin(object):
         super(WorkBreakdownMixin, self).__init__()
         # root of the hierarchy of tasks
         self.root_task = Task()
+        self.lock = util.NullLock()  # see enableConcurrency
+
+    def enableConcurrency(self):
+        """Protect the work breakdown with a reader-writer lock.
+
+        After this getTask and addTask (and WorkBreakdownBuilder) can be used
+        from several threads. Other access to the tasks (e.g. iteration) must
+        be done inside of reading() or writing() blocks. Must be called before
+        the project is shared between threads.
+        """
+        self.lock = util.RWLock()
+
+    def reading(self):
+        """Return context manager for consistent read access to the tasks."""
+        return self.lock.reading()
+
+    def writing(self):
+        """Return context manager for exclusive access to the tasks."""
+        return self.lock.writing()
 
     def getTask(self, path):
         """Look up task by absolute and relative path and return it."""
-        return self.root_task.navigate(path)
+        with self.lock.reading():
+            return self.root_task.navigate(path)
+
+    def getTaskByOutline(self, number):
+        """Look up task by outline number (e.g. "2.3.1") and return it."""
+        with self.lock.reading():
+            return self.root_task.navigateOutline(number)
 
     def getRootTask(self):
         """Return root task of the work breakdown structure."""
         return self.root_task
 
+    def addTask(self, id, title=None, parent=None):
+        """Add a task under parent (path) or under the root and return it."""
+        with self.lock.writing():
+            if parent is None:
+                parent_task = self.root_task
+            else:
+                parent_task = self.getTask(parent)
+            return Task(id, title, parent_task)
+
 
 class ContextStackEmpty(Exception):
     """Raised by WorkBreakdownBuilder.popContext if context stack is empty."""
@@ -41,22 +99,76 @@ class WorkBreakdownBuilder(object):
     """Helper class for building work breakdown structure of the project.
 
     WBB keeps current context and a stack of previous contexts. It adds tasks
-    under the current context.
+    under the current context. If the project has concurrency enabled, the
+    changes can be grouped into batch() blocks that readers see at once.
+
+    For loading many tasks at once use bulk() mode. In this mode new tasks are
+    only linked to their parents and they are added to the tree (with all the
+    checks and indexing) in one pass at the end. Navigation in bulk mode first
+    adds all the pending tasks.
     """
 
     def __init__(self, project):
         self.project = project
         self.context = project.getRootTask()
         self.context_stack = []  # previous contexts
+        self.pending = None  # tasks not yet added to the tree in bulk mode
 
     def setContext(self, new_context):
         """Set context to new_context and push current one onto the stack."""
         self.context_stack.append(self.context)
         self.context = new_context
 
+    def batch(self):
+        """Return context manager that holds the write lock of the project."""
+        return self.project.writing()
+
+    def beginBulk(self):
+        """Start bulk mode (unless already started), return True if started.
+
+        bulk() is the preferred way, this is for the callers that can't use a
+        with block. Locking is up to the caller.
+        """
+        if self.pending is not None:
+            return False
+        self.pending = []
+        return True
+
+    def flush(self):
+        """Add the tasks pending in bulk mode to the tree."""
+        if self.pending:
+            pending, self.pending = self.pending, []
+            tree.attachNodes(pending)
+
+    def endBulk(self):
+        """Add the pending tasks to the tree and leave bulk mode.
+
+        Raises tree.DuplicateChildren if some of the tasks had duplicate ids.
+        """
+        try:
+            self.flush()
+        finally:
+            self.pending = None
+
+    @contextlib.contextmanager
+    def bulk(self):
+        """Context manager for bulk mode (holds the write lock)."""
+        with self.project.writing():
+            started = self.beginBulk()
+            try:
+                yield self
+            finally:
+                if started:
+                    self.endBulk()
+
+    def _navigate(self, path):
+        self.flush()
+        return self.context.navigate(path)
+
     def navigateContext(self, path):
         """Navigate to a task by path and make it new context."""
-        self.setContext(self.context.navigate(path))
+        with self.project.reading():
+            self.setContext(self._navigate(path))
 
     def popContext(self):
         """Replace current context with the last one from the stack."""
@@ -72,10 +184,21 @@ class WorkBreakdownBuilder(object):
         or a path (then prefix is navigated from the current context and then
         the last part of the path is used as the id of the new task).
         """
-        if '.' in path:
-            parent_path, new_id = path.rsplit('.', 1)
-            parent = self.context.navigate(parent_path)
-        else:  # just id
-            parent = self.context
-            new_id = path
-        return Task(new_id, title, parent)
+        with self.project.writing():
+            if '.' in path:
+                parent_path, new_id = path.rsplit('.', 1)
+                parent = self._navigate(parent_path)
+            else:  # just id
+                parent = self.context
+                new_id = path
+            return self.addSubtask(parent, new_id, title)
+
+    def addSubtask(self, parent, id, title):
+        """Add a new task with id under parent and return it."""
+        if self.pending is None:
+            with self.project.writing():
+                return Task(id, title, parent)
+        task = Task(id, title)
+        task.parent = parent
+        self.pending.append(task)
+        return task
@@ -0,0 +1,73 @@
+"""
+Asyncio PPL reader.
+
+Reads PPL from asyncio streams without blocking the event loop. The input is
+decoded and split into lines incrementally and each line is handed to the
+command handling of reader.Reader as soon as it's complete, so parsing is
+interleaved with I/O and many inputs can be read concurrently on one loop.
+
+This module requires Python 3.6+ (it uses async generators).
+"""
+
+import asyncio
+import codecs
+
+from pmtk.ppl import reader
+
+
+class AsyncReader(reader.Reader):
+    """Makes project.Project objects out of asynchronous byte streams.
+
+    The stream can be an asyncio.StreamReader (or anything else with a
+    coroutine read(n) method) or an async iterator of bytes chunks. Chunks
+    don't need to be aligned with lines or characters.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, encoding='utf-8'):
+        self.encoding = encoding
+        super(AsyncReader, self).__init__()
+
+    def _reset(self, filename=None):
+        super(AsyncReader, self)._reset(filename)
+        self._decoder = codecs.getincrementaldecoder(self.encoding)()
+        self._tail = ''  # incomplete last line
+
+    def _feedText(self, text):
+        """Feed decoded text, keeping the incomplete last line for later."""
+        lines = (self._tail + text).split('\n')
+        self._tail = lines.pop()
+        for line in lines:
+            self._feedLine(line + '\n')
+
+    def _feedBytes(self, data, final=False):
+        self._feedText(self._decoder.decode(data, final))
+
+    async def _iterChunks(self, stream):
+        if hasattr(stream, 'read'):
+            while True:
+                chunk = await stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            async for chunk in stream:
+                yield chunk
+
+    async def readFromStream(self, stream):
+        """Load project from the asynchronous stream."""
+        self.stream = stream
+        self._reset()
+
+        async for chunk in self._iterChunks(stream):
+            self._feedBytes(chunk)
+            # Let other tasks run even if the stream had the data buffered.
+            await asyncio.sleep(0)
+
+        self._feedBytes(b'', final=True)
+        if self._tail:
+            self._feedLine(self._tail)
+            self._tail = ''
+
+        return self._finishFeeding()
@@ -5,10 +5,12 @@ Reads PPL files and builds project.Project objects based on the commands in the
 file.
 """
 
-import shlex
+import hashlib
 import itertools
+import os
+import shlex
 
-from pmtk.model import project, work
+from pmtk.model import project, tree, work
 
 
 class InvalidReaderInput(ValueError):
@@ -31,22 +33,142 @@ class SyntaxError(InvalidReaderInput):
     """The reader can't understand the syntax"""
 
 
+class UnknownTask(InvalidReaderInput):
+    """Referenced task doesn't exist or the reference is ambiguous."""
+
+
+class IncludeError(InvalidReaderInput):
+    """Included file can't be read or contains an error.
+
+    chain is the list of (filename, line_no) of the Include commands that led
+    to the error, starting from the outermost file.
+    """
+
+    def __init__(self, message, chain):
+        InvalidReaderInput.__init__(self, message)
+        self.message = message
+        self.chain = chain
+
+    def __str__(self):
+        return '%s (include chain: %s)' % (self.message,
+            ' -> '.join('%s:%d' % link for link in self.chain))
+
+
+def _readFile(filename):
+    """Read the file, return its text and digest of its content."""
+    with open(filename, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    if not isinstance(data, str):  # Python 3
+        data = data.decode('utf-8')
+    return data, digest
+
+
+class IncludeCache(object):
+    """Cache of the parsed included files.
+
+    Entries are keyed by absolute path and hold the digest of the content
+    that was parsed, so there is at most one entry per file and it's replaced
+    when the file changes. Each entry also remembers the digests of the files
+    that were included into the cached one, so that it's invalidated when any
+    of them changes.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, digest):
+        """Return (root task, included files) of the cached file or None."""
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == digest:
+            _, root, deps = entry
+            for dep_path, dep_digest in deps:
+                try:
+                    if _readFile(dep_path)[1] != dep_digest:
+                        break
+                except (IOError, OSError):
+                    break
+            else:
+                self.hits += 1
+                return root, deps
+            del self.entries[path]
+        self.misses += 1
+        return None
+
+    def put(self, path, digest, root, deps):
+        """Remember parsed file and the files included into it."""
+        self.entries[path] = (digest, root, tuple(deps))
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+
+include_cache = IncludeCache()  # shared by all readers in the process
+
+# Units of the durations in estimates, in minutes (a day is a working day).
+DURATION_UNITS = {'m': 1, 'h': 60, 'd': 8 * 60, 'w': 5 * 8 * 60}
+
+
+def parseDuration(text):
+    """Convert duration like "4d 4h" or "30m" into man-hours.
+
+    Numbers without units are hours.
+    """
+    minutes = 0
+    tokens = text.replace(',', ' ').split()
+    if not tokens:
+        raise SyntaxError("Duration expected")
+    for token in tokens:
+        unit = token[-1]
+        if unit in DURATION_UNITS:
+            number = token[:-1]
+        else:
+            number, unit = token, 'h'
+        try:
+            minutes += float(number) * DURATION_UNITS[unit]
+        except ValueError:
+            raise SyntaxError("Invalid duration: %s" % text.strip())
+    if minutes % 60 == 0:
+        return int(minutes // 60)
+    return minutes / 60.0
+
+
+class _EstimatesContext(object):
+    """Context inside of the Estimates section: the task paths are resolved
+    from the task.
+    """
+
+    command_name = 'Estimate'
+
+    def __init__(self, task):
+        self.task = task
+
+
 class Reader:
     """Makes project.Project objects out of PPL files."""
 
-    def __init__(self):
+    def __init__(self, include_cache=include_cache):
         self.stream = None
+        self.filename = None
+        self.include_cache = include_cache
+        self.include_chain = []  # (filename, line_no) of outer Includes
         self._reset()
 
     def _reset(self, filename=None):
         if filename is not None:
             self.filename = filename
         self.project = None
+        self.builder = None
         self.line_no = 0
         self.indent_level = 0
         self.indent_level_stack = []
         self.context = None
         self.context_stack = []
+        self.included = []  # (path, digest) of all included files
+        self.fragment = False  # reading an included file
 
     def _splitLine(self, line):
         """Split line into tokens.
@@ -115,7 +237,7 @@ class Reader:
         cmd_parts = self._splitLine(line)
         indent = cmd_parts.pop(0)
 
-        if cmd_parts[0] in ('Project', 'Task'):
+        if cmd_parts[0] in ('Project', 'Task', 'Include', 'Estimates'):
             cmd = cmd_parts.pop(0)
         elif cmd_parts[0].startswith('$') and ' ' not in cmd_parts[0]:
             cmd = 'Property'
@@ -136,16 +258,34 @@ class Reader:
 
         return indent, cmd, cmd_parts
 
+    def _isCommandLine(self, line):
+        """Count the line and check if it contains a command.
+
+        Empty lines and comment lines don't contain commands.
+        """
+        self.line_no += 1
+        if not line or line.isspace():
+            return False
+        if line.strip().startswith('--'):
+            return False
+        return True
+
     def _getNextLine(self):
         for line in self.stream:
-            self.line_no += 1
-            if line.isspace():
-                continue
-            if line.strip().startswith('--'):
-                continue
-            return line
+            if self._isCommandLine(line):
+                return line
         return None  # EOF
 
+    def _doCommand(self, line):
+        """Execute one command contained in the line."""
+        indent, cmd, args = self._breakCommand(line)
+        self._handleIndent(indent)
+        handler = getattr(self, '_handle%sCommand' % cmd)
+        obj = handler(args)
+
+        if obj is not None:
+            self._setContext(obj, indent)
+
     def _doOneCommand(self):
         """Read one command from the input file and execute it.
 
@@ -155,20 +295,55 @@ class Reader:
         if line is None:
             return False
 
-        indent, cmd, args = self._breakCommand(line)
-        self._handleIndent(indent)
-        handler = getattr(self, '_handle%sCommand' % cmd)
-        obj = handler(args)
+        self._doCommand(line)
+        return True
 
-        if obj is not None:
-            self._setContext(obj, indent)
+    def _feedLine(self, line):
+        """Process one line of input that was obtained by the caller.
 
-        return True
+        This is used by the readers that get their input in chunks (see
+        pmtk.ppl.aioreader) instead of iterating over the stream.
+        """
+        if self._isCommandLine(line):
+            self._doCommand(line)
+
+    def _finishFeeding(self):
+        """Check that the input made a project, finish and return it."""
+        if self.project is None:
+            raise PrematureEOF("Input file contains no commands")
+        self._attachTasks(end=True)
+        return self.project
+
+    def _attachTasks(self, end=False):
+        """Add the tasks pending in the builder to the tree.
+
+        Duplicate ids are only found at this point, so they are reported
+        with the lines where the duplicate tasks were defined (and line_no
+        is set to the first of those lines).
+        """
+        try:
+            if end:
+                self.builder.endBulk()
+            else:
+                self.builder.flush()
+        except tree.DuplicateChildren as e:
+            lines = [task.source[1] for task in e.nodes]
+            self.line_no = min(lines)
+            raise SyntaxError('Duplicate task id: %s' % ', '.join(
+                '%s (line %d)' % item for item in zip(e.paths, lines)))
+
+    def _startProject(self, id):
+        """Create the project and start adding tasks to it in bulk mode."""
+        self.project = project.Project(id)
+        self.builder = work.WorkBreakdownBuilder(self.project)
+        self.builder.beginBulk()
 
     def _handleProjectCommand(self, args):
+        if self.project is not None:
+            raise UnexpectedCommand("Only one Project command is allowed")
         if len(args) < 1:
             raise SyntaxError("Project must have an id")
-        self.project = project.Project(args[0])  # id
+        self._startProject(args[0])
         if len(args) > 1:
             self.project.title = args[1]  # title
         return self.project
@@ -186,7 +361,110 @@ class Reader:
         else:
             parent = self.context
 
-        return work.Task(id, title, parent)
+        task = self.builder.addSubtask(parent, id, title)
+        task.source = (self.filename, self.line_no)
+        return task
+
+    def _includeLink(self):
+        return (self.filename or '<stream>', self.line_no)
+
+    def _resolveInclude(self, filename):
+        """Return absolute path of the included file."""
+        if not os.path.isabs(filename) and self.filename is not None:
+            filename = os.path.join(os.path.dirname(self.filename), filename)
+        return os.path.abspath(filename)
+
+    def _loadInclude(self, path):
+        """Parse the included file (or get it from cache), return root task."""
+        chain = self.include_chain + [self._includeLink()]
+        if path in [os.path.abspath(f) for f, _ in chain]:
+            raise IncludeError('Circular include of %s' % path, chain)
+        try:
+            data, digest = _readFile(path)
+        except (IOError, OSError) as e:
+            raise IncludeError('Cannot read %s: %s' % (path, e), chain)
+
+        entry = self.include_cache.get(path, digest)
+        if entry is not None:
+            root, deps = entry
+            self.included.append((path, digest))
+            self.included.extend(deps)
+            return root
+
+        rdr = Reader(self.include_cache)
+        rdr.include_chain = chain
+        try:
+            root = rdr.readFragment(data.splitlines(True), path)
+        except IncludeError:
+            raise
+        except InvalidReaderInput as e:
+            raise IncludeError('%s:%d: %s' % (path, rdr.line_no, e), chain)
+        except ValueError as e:  # duplicate ids found at the end of the file
+            raise IncludeError('%s: %s' % (path, e), chain)
+        self.include_cache.put(path, digest, root, rdr.included)
+        self.included.append((path, digest))
+        self.included.extend(rdr.included)
+        return root
+
+    def _handleIncludeCommand(self, args):
+        """Include command: Include <filename>.
+
+        Tasks of the included file are copied under the current context. The
+        included file contains only tasks (no Project command) and its
+        relative path is resolved from the directory of the including file.
+        """
+        if len(args) != 1:
+            raise SyntaxError("Include must have exactly one file name")
+
+        if self.context is None or self.context is self.project:
+            parent = self.project.getRootTask()
+        else:
+            parent = self.context
+
+        path = self._resolveInclude(args[0])
+        root = self._loadInclude(path)
+        self._attachTasks()  # parent must be in the tree to copy under it
+        for task in root.listChildren():
+            if task.id in parent.children:
+                raise IncludeError('%s: Duplicate child id: %s' % (path,
+                    '.'.join(parent.abs_path + (task.id,))),
+                    self.include_chain + [self._includeLink()])
+        for task in root.listChildren():
+            task.copy(parent)
+
+        return None
+
+    def _handleEstimatesCommand(self, args):
+        """Estimates command: starts a section with the estimates.
+
+        Lines in the section are task paths that set the context for the
+        indented lines below them or "<path>[, <path>...]: <duration>".
+        """
+        if args:
+            raise SyntaxError("Estimates command has no arguments")
+        if self.fragment:
+            raise UnexpectedCommand("Estimates can't be in included files")
+        return _EstimatesContext(self.project.getRootTask())
+
+    def _findTask(self, path):
+        """Return the task at path relative to the estimates context."""
+        self._attachTasks()  # pending tasks must be in the tree
+        try:
+            return self.context.task.navigate(path)
+        except LookupError as e:
+            raise UnknownTask('Unknown task: %s' % (str(e) or path))
+
+    def _handleEstimateCommand(self, args):
+        """One line inside of the Estimates section."""
+        text = ' '.join(args)
+        if ':' not in text:
+            return _EstimatesContext(self._findTask(text.strip()))
+        paths, duration = text.split(':', 1)
+        man_hours = parseDuration(duration)
+        for path in paths.split(','):
+            task = self._findTask(path.strip())
+            self.project.addEstimate(task.getAbsolutePath(), man_hours)
+        return None
 
     def _handleDescriptionCommand(self, args):
         """Description command: "<description text>"."""
@@ -212,10 +490,30 @@ class Reader:
         self.stream = stream
         self._reset()
 
-        if not self._doOneCommand():
-            raise PrematureEOF("Input file contains no commands")
+        while self._doOneCommand():
+            pass
+
+        return self._finishFeeding()
+
+    def readFromFile(self, filename):
+        """Load project from the file."""
+        with open(filename) as f:
+            self.filename = filename
+            return self.readFromStream(f)
+
+    def readFragment(self, stream, filename=None):
+        """Load tasks from the stream that has no Project command.
+
+        This is used for included files. Returns the root task.
+        """
+        self.stream = iter(stream)
+        self.filename = filename
+        self._reset()
+        self.fragment = True
+        self._startProject(None)
 
         while self._doOneCommand():
             pass
 
-        return self.project
+        self._attachTasks(end=True)
+        return self.project.getRootTask()
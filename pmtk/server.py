@@ -0,0 +1,224 @@
+"""
+Plan server.
+
+Keeps parsed projects in memory and answers queries about them over a Unix
+socket, so that the tools don't have to parse the plans for every lookup. The
+PPL files (including the files they include) are checked for changes on each
+query and re-parsed only when they change.
+
+Protocol
+--------
+The client sends one query per line: a command followed by its arguments
+(quoted the same way as in PPL). The server responds with "OK <n>" followed
+by n lines of results or with "ERROR <message>". Commands:
+
+* projects -- list loaded projects: "<id>\\t<filename>[\\t<error>]",
+* task <project> <path> -- "<absolute path>\\t<title>" of the task,
+* effort <project> <path> -- effort of the task (from the Estimates
+  sections of the PPL files),
+* descendants <project> <path> -- absolute paths of all the subtasks,
+* quit -- close the connection.
+"""
+
+import os
+import shlex
+import socket
+import threading
+
+try:
+    import socketserver
+except ImportError:  # Python 2
+    import SocketServer as socketserver
+
+from pmtk.ppl import reader
+
+
+class QueryError(Exception):
+    """The query can't be answered."""
+
+
+class _LoadedFile(object):
+    """Project loaded from a file and the state of the files it was read from.
+    """
+
+    def __init__(self, filename):
+        self.filename = os.path.abspath(filename)
+        self.project = None
+        self.error = None
+        self.stamps = {}  # (mtime, size) of the file and included files
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime, st.st_size)
+
+    def isStale(self):
+        return any(self._stamp(path) != stamp
+                for path, stamp in self.stamps.items())
+
+    def load(self):
+        """(Re)parse the file, keep the old project if parsing fails."""
+        rdr = reader.Reader()
+        stamps = {self.filename: self._stamp(self.filename)}
+        try:
+            project = rdr.readFromFile(self.filename)
+        except (reader.InvalidReaderInput, EnvironmentError, ValueError) as e:
+            self.error = str(e)
+        else:
+            self.project = project
+            self.error = None
+            for path, _ in rdr.included:
+                stamps[path] = self._stamp(path)
+        self.stamps = stamps
+
+
+class ProjectStore(object):
+    """Projects loaded from PPL files that are re-parsed when files change."""
+
+    def __init__(self, filenames=()):
+        self.lock = threading.Lock()
+        self.files = {}  # loaded files by project id
+        for filename in filenames:
+            self.addFile(filename)
+
+    def addFile(self, filename):
+        """Load the project from the file, return its id."""
+        loaded = _LoadedFile(filename)
+        loaded.load()
+        if loaded.project is None:
+            raise QueryError('Cannot load %s: %s' % (filename, loaded.error))
+        with self.lock:
+            self.files[loaded.project.id] = loaded
+        return loaded.project.id
+
+    def getProject(self, project_id):
+        """Return the project, re-parsing it if the files have changed."""
+        with self.lock:
+            try:
+                loaded = self.files[project_id]
+            except KeyError:
+                raise QueryError('Unknown project: %s' % project_id)
+            if loaded.isStale():
+                loaded.load()
+            return loaded.project
+
+    def listProjects(self):
+        with self.lock:
+            return sorted(self.files.items())
+
+
+class PlanServer(socketserver.ThreadingMixIn,
+        socketserver.UnixStreamServer):
+    """Server that answers queries about the projects in the store."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, store):
+        self.store = store
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # stale socket from a previous run
+        socketserver.UnixStreamServer.__init__(self, socket_path,
+                QueryHandler)
+
+    def _getTask(self, project_id, path):
+        """Return the project and the task at path in it."""
+        project = self.store.getProject(project_id)
+        try:
+            return project, project.getTask(path)
+        except LookupError as e:
+            raise QueryError(str(e) or path)
+
+    def _queryProjects(self):
+        result = []
+        for project_id, loaded in self.store.listProjects():
+            line = '%s\t%s' % (project_id, loaded.filename)
+            if loaded.error is not None:
+                line += '\t' + loaded.error
+            result.append(line)
+        return result
+
+    def _queryTask(self, project_id, path):
+        project, task = self._getTask(project_id, path)
+        return ['%s\t%s' % (task.getAbsolutePath(), task.title)]
+
+    def _queryEffort(self, project_id, path):
+        project, task = self._getTask(project_id, path)
+        return [str(project.getTaskEffort(task.getAbsolutePath()))]
+
+    def _queryDescendants(self, project_id, path):
+        project, task = self._getTask(project_id, path)
+        return [t.getAbsolutePath() for t in task.yieldDescendants()]
+
+    def answer(self, line):
+        """Answer one query, return the list of result lines."""
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            raise QueryError(str(e))
+        if not args:
+            raise QueryError('Empty query')
+        handler = getattr(self, '_query%s' % args[0].capitalize(), None)
+        if handler is None:
+            raise QueryError('Unknown command: %s' % args[0])
+        if len(args) != handler.__code__.co_argcount:  # self is args[0]
+            raise QueryError('Wrong number of arguments for %s' % args[0])
+        return handler(*args[1:])
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """Reads queries from the connection and writes the responses."""
+
+    def handle(self):
+        for line in iter(self.rfile.readline, b''):
+            line = line.decode('utf-8').strip()
+            if line == 'quit':
+                break
+            try:
+                result = self.server.answer(line)
+            except QueryError as e:
+                response = 'ERROR %s\n' % e
+            else:
+                response = 'OK %d\n' % len(result) + \
+                    ''.join(r + '\n' for r in result)
+            self.wfile.write(response.encode('utf-8'))
+            self.wfile.flush()
+
+
+def serve(socket_path, filenames):
+    """Load the projects from the files and serve them until interrupted."""
+    server = PlanServer(socket_path, ProjectStore(filenames))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+class Client(object):
+    """Client for the plan server."""
+
+    def __init__(self, socket_path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.file = self.sock.makefile('rwb')
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def query(self, line):
+        """Send the query and return the list of result lines.
+
+        Raises QueryError if the server responds with an error.
+        """
+        self.file.write(line.encode('utf-8') + b'\n')
+        self.file.flush()
+        status = self.file.readline().decode('utf-8').rstrip('\n')
+        if status.startswith('ERROR '):
+            raise QueryError(status[6:])
+        count = int(status.split()[1])
+        return [self.file.readline().decode('utf-8').rstrip('\n')
+                for i in range(count)]
@@ -0,0 +1,69 @@
+"""
+Contention benchmark for the concurrent access to the work breakdown.
+
+Several reader threads look up tasks with getTask while one writer adds
+batches of tasks with WorkBreakdownBuilder. Prints the throughput of the
+readers and the writer. Run as: python pmtk/tests/bench_concurrency.py
+"""
+
+import threading
+import time
+import base  # noqa
+
+from pmtk.model.project import Project
+from pmtk.model.work import WorkBreakdownBuilder
+
+DURATION = 2.0  # seconds
+READERS = 4
+BATCH_SIZE = 20
+
+
+def run(readers=READERS, duration=DURATION, batch_size=BATCH_SIZE):
+    project = Project('bench')
+    project.enableConcurrency()
+    builder = WorkBreakdownBuilder(project)
+    with builder.batch():
+        for i in range(100):
+            builder.setContext(builder.addTask('g%d' % i, None))
+            for j in range(10):
+                builder.addTask('t%d' % j, None)
+            builder.popContext()
+
+    done = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+
+    def read(n):
+        i = 0
+        while not done.is_set():
+            project.getTask('.g%d.t%d' % (i % 100, i % 10))
+            i += 1
+        reads[n] = i
+
+    def write():
+        i = 0
+        while not done.is_set():
+            with builder.batch():
+                builder.setContext(builder.addTask('w%d' % i, None))
+                for j in range(batch_size):
+                    builder.addTask('t%d' % j, None)
+                builder.popContext()
+            i += 1
+        writes[0] = i * (batch_size + 1)
+
+    threads = [threading.Thread(target=read, args=(n,))
+            for n in range(readers)] + [threading.Thread(target=write)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    print('%d readers: %.0f lookups/s, writer: %.0f tasks/s' % (readers,
+        sum(reads) / duration, writes[0] / duration))
+
+
+if __name__ == '__main__':
+    for readers in (1, 2, 4, 8):
+        run(readers)
@@ -0,0 +1,65 @@
+"""
+Benchmark for the import time of the reader.
+
+Imports the reader in a fresh interpreter and prints the time it takes,
+together with the import time of pkg_resources for reference. Exits with an
+error if the import fails or takes longer than the budget. Run as:
+python pmtk/tests/bench_import.py
+"""
+
+import subprocess
+import sys
+import base  # noqa
+
+from os.path import abspath, dirname
+
+ROOT = dirname(dirname(dirname(abspath(__file__))))
+
+# Budget for importing the reader in a fresh interpreter. The usual time is
+# about 15ms, importing pkg_resources alone takes 80-100ms. If pkg_resources is
+# available the budget is also capped at half of its import time measured on
+# the same machine, so that loading it again is always caught.
+IMPORT_BUDGET = 0.1  # seconds
+
+MEASURE = """
+import sys, time
+sys.path.insert(0, %r)
+start = time.time()
+import %s
+print(time.time() - start)
+print('pkg_resources' in sys.modules)
+"""
+
+
+def measureImport(module):
+    """Import module in a fresh interpreter, return (seconds, pkg_resources
+    loaded) or None if it can't be imported.
+    """
+    try:
+        output = subprocess.check_output([sys.executable, '-c',
+            MEASURE % (ROOT, module)], stderr=subprocess.STDOUT)
+    except subprocess.CalledProcessError:
+        return None
+    elapsed, pkg_resources_loaded = output.decode('ascii').split()[-2:]
+    return float(elapsed), pkg_resources_loaded == 'True'
+
+
+def main(module='pmtk.ppl.reader'):
+    result = measureImport(module)
+    if result is None:
+        sys.exit('Cannot import %s' % module)
+    elapsed, pkg_resources_loaded = result
+    budget = IMPORT_BUDGET
+    reference = measureImport('pkg_resources')
+    if reference is not None:
+        print('%-15s %.3fs' % ('pkg_resources', reference[0]))
+        budget = min(budget, reference[0] / 2)
+    print('%-15s %.3fs (budget %.3fs)' % (module, elapsed, budget))
+    if pkg_resources_loaded:
+        sys.exit('%s loads pkg_resources' % module)
+    if elapsed >= budget:
+        sys.exit('Import took too long')
+
+
+if __name__ == '__main__':
+    main()
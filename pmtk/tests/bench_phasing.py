@@ -0,0 +1,47 @@
+"""
+Benchmark for the time-phased effort.
+
+Builds a plan of 20k tasks over 3 years and prints the time it takes to
+calculate the cumulative curves of the top level tasks, with and without
+numpy (if it's installed). Run as: python pmtk/tests/bench_phasing.py
+"""
+
+import random
+import time
+import base  # noqa
+
+from pmtk.model.phasing import TimePhasedEffort, _importNumpy
+from pmtk.model.project import Project
+
+TASKS = 20000
+DAYS = 3 * 365
+TOP_LEVEL = 20
+
+
+def run(use_numpy, tasks=TASKS, days=DAYS, top_level=TOP_LEVEL):
+    """Return the time to calculate the top level curves in seconds."""
+    rnd = random.Random(1)
+    project = Project('bench')
+    top = [project.addTask('t%d' % i).getAbsolutePath()
+            for i in range(top_level)]
+    for i in range(tasks):
+        project.addTask('s%d' % i, parent=rnd.choice(top))
+    te = TimePhasedEffort(project, days, use_numpy=use_numpy)
+    for task in project.getRootTask().yieldDescendants():
+        if not task.children:
+            start = rnd.randrange(days - 5)
+            te.addInterval(task.getAbsolutePath(), start, start + 5, 10)
+    start_time = time.time()
+    te.getCurves(max_depth=1, cumulative=True)
+    return time.time() - start_time
+
+
+def main():
+    engines = [False] + ([True] if _importNumpy() is not None else [])
+    for use_numpy in engines:
+        print('%-6s %.3fs' % ('numpy' if use_numpy else 'python',
+            run(use_numpy)))
+
+
+if __name__ == '__main__':
+    main()
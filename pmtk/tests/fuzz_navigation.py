@@ -0,0 +1,127 @@
+"""
+Differential fuzzing of the navigation.
+
+Node._navigateFuzzy is the reference implementation of the navigation rules
+(see the docstring of the tree module). The harness builds random trees with
+few distinct ids, so that relative paths collide a lot, and changes them
+(adds, moves and removes nodes) between the rounds of queries. Node.navigate
+must return the same nodes and raise the same exceptions as the reference for
+random origins and paths. Prints the throughput of both implementations.
+Run as: python pmtk/tests/fuzz_navigation.py [seed]
+"""
+
+import random
+import sys
+import time
+import base  # noqa
+
+from pmtk.model.tree import Node, AmbiguousPath, NonexistentPath
+
+IDS = 'abc'
+
+
+class Mismatch(AssertionError):
+    """The implementations disagree."""
+
+
+def _outcome(navigate, path):
+    """Return the result of navigation in a comparable form."""
+    try:
+        return ('found', navigate(path))
+    except AmbiguousPath as e:
+        return ('ambiguous', e.path, [node.abs_path for node in e.nodes])
+    except NonexistentPath as e:
+        return ('nonexistent', str(e))
+
+
+def randomTree(rnd, size, ids=IDS):
+    """Return the root of a random tree with up to size nodes."""
+    root = Node()
+    nodes = [root]
+    for i in range(size):
+        parent = rnd.choice(nodes)
+        free = [id for id in ids if id not in parent.children]
+        if free:
+            nodes.append(Node(rnd.choice(free), parent))
+    return root
+
+
+def _allNodes(root):
+    return [root] + list(root.yieldDescendants())
+
+
+def mutate(rnd, root, ids=IDS):
+    """Add, move or remove a random node."""
+    nodes = _allNodes(root)
+    node = rnd.choice(nodes)
+    action = rnd.choice(['add', 'add', 'move', 'remove'])
+    if action == 'add':
+        free = [id for id in ids if id not in node.children]
+        if free:
+            Node(rnd.choice(free), node)
+    elif node.parent is not None:
+        if action == 'remove':
+            node.detach()
+        else:
+            new_parent = rnd.choice(nodes)
+            try:
+                node.moveTo(new_parent)
+            except ValueError:
+                pass  # under itself or duplicate id
+
+
+def randomPath(rnd, nodes, ids=IDS):
+    """Return a relative path: mostly a suffix of some node's path."""
+    length = rnd.randint(1, 3)
+    if rnd.random() < 0.8:
+        abs_path = rnd.choice(nodes).abs_path
+        return '.'.join(abs_path[-min(length, len(abs_path) - 1):])
+    return '.'.join(rnd.choice(ids + 'x') for i in range(length))
+
+
+def run(seed=0, rounds=50, size=300, queries=500, repeat=3, ids=IDS):
+    """Run the fuzzer, raise Mismatch on difference, return timings.
+
+    Each round makes a few changes to the tree and runs the same random
+    queries repeat times through each implementation.
+    """
+    rnd = random.Random(seed)
+    root = randomTree(rnd, size, ids)
+    timings = {'reference': 0.0, 'optimized': 0.0, 'queries': 0}
+    for r in range(rounds):
+        for i in range(rnd.randint(1, 5)):
+            mutate(rnd, root, ids)
+        nodes = [node for node in _allNodes(root) if node.parent is not None]
+        if not nodes:
+            continue
+        batch = [(rnd.choice(nodes + [root]), randomPath(rnd, nodes, ids))
+                for i in range(queries)]
+
+        start = time.time()
+        for i in range(repeat):
+            expected = [_outcome(origin._navigateFuzzy, path)
+                    for origin, path in batch]
+        timings['reference'] += time.time() - start
+        start = time.time()
+        for i in range(repeat):
+            actual = [_outcome(origin.navigate, path)
+                    for origin, path in batch]
+        timings['optimized'] += time.time() - start
+        timings['queries'] += len(batch) * repeat
+
+        for (origin, path), exp, act in zip(batch, expected, actual):
+            if exp != act:
+                raise Mismatch('seed %s round %d: %s from %s: expected %r, '
+                        'got %r' % (seed, r, path, origin, exp, act))
+    return timings
+
+
+def main(seed=0):
+    timings = run(seed)
+    for name in ('reference', 'optimized'):
+        print('%-10s %8.0f queries/s' % (name,
+            timings['queries'] / max(timings[name], 1e-9)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 0)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the asyncio ppl reader
+"""
+
+import sys
+import unittest
+import base  # noqa (base imported and not used, but it's ok)
+
+try:
+    import asyncio
+except ImportError:  # Python 2
+    asyncio = None
+
+requires_asyncio = unittest.skipIf(asyncio is None or sys.version_info < (3, 6),
+        'asyncio reader requires Python 3.6+')
+
+PPL = u"""
+Project 3372 "Project № 3372"
+-- comment
+Task a
+    "Description a"
+    b
+Task c
+    $prop value
+""".encode('utf-8')
+
+
+class ChunkIterator(object):
+    """Async iterator over fixed size chunks of data."""
+
+    def __init__(self, data, size):
+        self.chunks = [data[i:i + size] for i in range(0, len(data), size)]
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        future = asyncio.Future()
+        if self.chunks:
+            future.set_result(self.chunks.pop(0))
+        else:
+            future.set_exception(StopAsyncIteration())
+        return future
+
+
+@requires_asyncio
+class TestAsyncReader(unittest.TestCase):
+    """Tests for the AsyncReader class."""
+
+    def setUp(self):
+        from pmtk.ppl import aioreader, reader
+        self.aioreader = aioreader
+        self.reader = reader
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _read(self, stream):
+        rdr = self.aioreader.AsyncReader()
+        return self.loop.run_until_complete(rdr.readFromStream(stream))
+
+    def _checkProject(self, prj):
+        self.assertEqual(prj.id, '3372')
+        self.assertEqual(prj.title, u'Project № 3372')
+        self.assertEqual(prj.getTask('.a').description, 'Description a')
+        self.assertEqual(prj.getTask('.a.b').title, 'b')
+        self.assertEqual(prj.getTask('c').getProperty('prop'), 'value')
+
+    def _makeStream(self, data):
+        """Return asyncio.StreamReader with the data.
+
+        The stream is created in a callback while the loop is running, so
+        that it's attached to our loop (newer Pythons require that).
+        """
+        future = self.loop.create_future()
+
+        def create():
+            stream = asyncio.StreamReader()
+            stream.feed_data(data)
+            stream.feed_eof()
+            future.set_result(stream)
+
+        self.loop.call_soon(create)
+        return self.loop.run_until_complete(future)
+
+    def test_stream_reader(self):
+        """Read from asyncio.StreamReader."""
+        self._checkProject(self._read(self._makeStream(PPL)))
+
+    def test_chunk_iterator(self):
+        """Read from async iterator with chunks split inside of characters."""
+        for size in (1, 2, 7, 1000):
+            self._checkProject(self._read(ChunkIterator(PPL, size)))
+
+    def test_no_trailing_newline(self):
+        """Last line without newline is still read."""
+        prj = self._read(ChunkIterator(b'Project 1\nTask a', 3))
+        self.assertEqual(prj.getTask('.a').id, 'a')
+
+    def test_empty(self):
+        """Empty input -- should fail."""
+        self.assertRaises(self.reader.PrematureEOF,
+                self._read, ChunkIterator(b'\n-- nothing\n', 4))
+
+    def test_errors(self):
+        """Errors of the command handling are raised."""
+        self.assertRaises(self.reader.UnexpectedCommand,
+                self._read, ChunkIterator(b'Task a\n', 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests for the work breakdown comparison module model.diff.
+"""
+
+import unittest
+import base
+
+from pmtk.model.diff import diff, diffTrees
+from pmtk.model.project import Project
+from pmtk.model.work import Task
+
+
+class TestDiff(unittest.TestCase):
+    """Test comparison of task trees."""
+
+    def _build_tree(self):
+        root = Task()
+        a = Task('a', 'A', root)
+        Task('b', None, a)
+        c = Task('c', None, a)
+        Task('d', None, c)
+        e = Task('e', None, root)
+        Task('f', None, e)
+        return root
+
+    def test_identical(self):
+        self.assertTrue(diffTrees(self._build_tree(),
+            self._build_tree()).isEmpty())
+
+    def test_added_removed(self):
+        old = self._build_tree()
+        new = self._build_tree()
+        Task('g', None, new.navigate('.e'))
+        Task('h', None, Task('x', None, new))
+        new.navigate('.a').removeChild('c')
+        d = diffTrees(old, new)
+        self.assertEqual(d.added, ['.e.g', '.x', '.x.h'])
+        self.assertEqual(d.removed, ['.a.c', '.a.c.d'])
+        self.assertEqual(d.moved, [])
+        self.assertEqual(d.modified, [])
+
+    def test_modified(self):
+        old = self._build_tree()
+        new = self._build_tree()
+        new.navigate('.a.c.d').title = 'D'
+        new.navigate('.e').description = 'E'
+        new.navigate('.a.b').setProperty('owner', 'me')
+        d = diffTrees(old, new)
+        self.assertEqual(d.modified, ['.a.b', '.a.c.d', '.e'])
+        self.assertEqual(d.added + d.removed + d.moved, [])
+
+    def test_moved(self):
+        old = self._build_tree()
+        new = Task()
+        a = Task('a', 'A', new)
+        Task('b', None, a)
+        e = Task('e', None, new)
+        Task('f', None, e)
+        c = Task('c', None, e)
+        Task('d', 'D', c)
+        Task('z', None, c)
+        d = diffTrees(old, new)
+        self.assertEqual(d.moved, [('.a.c', '.e.c')])
+        self.assertEqual(d.modified, ['.e.c.d'])
+        self.assertEqual(d.added, ['.e.c.z'])
+        self.assertEqual(d.removed, [])
+
+    def test_moved_under_new(self):
+        """Task moved under a new parent is found."""
+        old = Task()
+        Task('c', None, Task('X', None, old))
+        new = Task()
+        Task('c', None, Task('X', None, Task('NEW', None, new)))
+        d = diffTrees(old, new)
+        self.assertEqual(d.moved, [('.X', '.NEW.X')])
+        self.assertEqual(d.added, ['.NEW'])
+        self.assertEqual(d.removed, [])
+
+    def test_moved_from_removed(self):
+        """Task moved out of a removed parent is found."""
+        old = self._build_tree()
+        new = self._build_tree()
+        c = new.navigate('.a.c')
+        c.moveTo(new.navigate('.e'))
+        new.removeChild('a')
+        d = diffTrees(old, new)
+        self.assertEqual(d.moved, [('.a.c', '.e.c')])
+        self.assertEqual(d.removed, ['.a', '.a.b'])
+        self.assertEqual(d.added, [])
+
+    def test_projects(self):
+        pa = Project('a')
+        pb = Project('b')
+        Task('t', None, pa.getRootTask())
+        Task('t', None, pb.getRootTask()).description = 'changed'
+        self.assertEqual(diff(pa, pb).modified, ['.t'])
+
+
+if __name__ == '__main__':
+    unittest.main()
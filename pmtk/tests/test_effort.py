@@ -21,6 +21,22 @@ class EffortTest(unittest.TestCase):
         p.addEstimate('bb', 2)
         self.failUnlessEqual(p.getTotalEffort(), 10)
 
+    def test_move(self):
+        """Estimates stay with the tasks when they are moved or removed."""
+        p = Project('p')
+        p.addTask('a')
+        p.addTask('b')
+        p.addTask('c', parent='a')
+        p.addEstimate('c', 3)
+        p.addEstimate('b', 2)
+        p.getTask('c').moveTo(p.getTask('b'))
+        self.failUnlessEqual(p.getTaskEffort('.b.c'), 3)
+        self.failUnlessEqual(p.getTaskEffort('a'), 0)
+        p.getTask('b').detach()
+        p.addTask('b')
+        self.failUnlessEqual(p.getTotalEffort(), 0)
+        self.failUnlessEqual(p.getEffortRollup()[p.getTask('b')], 0)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,73 @@
+"""
+Tests for the work breakdown export
+"""
+
+import json
+import unittest
+import base
+
+from StringIO import StringIO
+
+from pmtk import export
+from pmtk.model.project import Project
+
+
+class TestExport(unittest.TestCase):
+
+    def _build_project(self):
+        prj = Project('p')
+        a = prj.addTask('a', 'Task A')
+        a.description = 'Line 1\nLine 2'
+        a.setProperty('owner', 'me')
+        prj.addTask('b', parent='a')
+        prj.addTask('c', parent='a')
+        prj.addTask('d')
+        prj.addEstimate('.a.b', 3)
+        prj.addEstimate('.a.c', 2)
+        return prj
+
+    def test_effortRollup(self):
+        prj = self._build_project()
+        prj.addEstimate('.a', 4)
+        efforts = prj.getEffortRollup()
+        self.assertEqual(efforts[prj.getTask('.a')], 4)
+        self.assertEqual(efforts[prj.getTask('.a.b')], 3)
+        self.assertEqual(efforts[prj.getTask('.d')], 0)
+        self.assertEqual(efforts[prj.getRootTask()], 4)
+
+    def test_csv(self):
+        out = StringIO()
+        export.exportCSV(self._build_project(), out,
+            columns=('path', 'level', 'title', 'description', 'effort',
+                '$owner'), chunk_size=2)
+        self.assertEqual(out.getvalue(),
+            'path,level,title,description,effort,$owner\n'
+            '.a,1,Task A,"Line 1\nLine 2",5,me\n'
+            '.a.b,2,b,,3,\n'
+            '.a.c,2,c,,2,\n'
+            '.d,1,d,,0,\n')
+
+    def test_json_lines(self):
+        out = StringIO()
+        export.exportJSONLines(self._build_project(), out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 4)
+        a = [row for row in rows if row['path'] == '.a'][0]
+        self.assertEqual(a, {'path': '.a', 'level': 1, 'title': 'Task A',
+            'description': 'Line 1\nLine 2', 'properties': {'owner': 'me'},
+            'effort': 5})
+
+    def test_order(self):
+        """Tasks are exported in the order they were added."""
+        rows = list(export.yieldRows(self._build_project(),
+            ('path', 'outline')))
+        self.assertEqual(rows, [['.a', '1'], ['.a.b', '1.1'],
+            ['.a.c', '1.2'], ['.d', '2']])
+
+    def test_unknown_column(self):
+        self.assertRaises(ValueError, list,
+            export.yieldRows(self._build_project(), ('nope',)))
+
+
+if __name__ == '__main__':
+    unittest.main()
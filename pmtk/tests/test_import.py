@@ -0,0 +1,26 @@
+"""
+Tests for the imports of pmtk packages.
+"""
+
+import unittest
+import base  # noqa
+
+from bench_import import measureImport
+
+
+class TestImport(unittest.TestCase):
+
+    def test_reader_import(self):
+        """Importing the reader doesn't load pkg_resources.
+
+        The import time is checked by bench_import.py.
+        """
+        result = measureImport('pmtk.ppl.reader')
+        if result is None:
+            self.fail('pmtk.ppl.reader cannot be imported')
+        elapsed, pkg_resources_loaded = result
+        self.assertFalse(pkg_resources_loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests for the path linter module model.lint.
+"""
+
+import random
+import unittest
+import base
+
+from StringIO import StringIO
+
+from pmtk.model.lint import lintTree, lintProject
+from pmtk.model.tree import Node, AmbiguousPath
+from pmtk.ppl import reader
+
+
+class TestLint(unittest.TestCase):
+
+    def _random_tree(self, rnd, size, ids='abcd'):
+        root = Node()
+        nodes = [root]
+        for i in range(size):
+            parent = rnd.choice(nodes)
+            free = [id for id in ids if id not in parent.children]
+            if free:
+                nodes.append(Node(rnd.choice(free), parent))
+        return root, nodes
+
+    def test_issues_match_navigation(self):
+        """Reported issues agree with the navigation."""
+        rnd = random.Random(1)
+        for i in range(20):
+            root, nodes = self._random_tree(rnd, 40)
+            for issue in lintTree(root):
+                try:
+                    found = [issue.scope.navigate(issue.path)]
+                except AmbiguousPath as e:
+                    found = e.nodes
+                if issue.kind == 'ambiguous':
+                    self.assertEqual(set(found), set(issue.nodes))
+                else:
+                    self.assertEqual(set(found), set(issue.shadowing))
+                    self.assertFalse(set(found) & set(issue.nodes))
+
+    def _isInSubtree(self, node, root):
+        while node is not None and node is not root:
+            node = node.parent
+        return node is root
+
+    def test_all_ambiguities_found(self):
+        """Every ambiguous path is reported in the subtree or below."""
+        rnd = random.Random(2)
+        for i in range(20):
+            root, nodes = self._random_tree(rnd, 40)
+            reported = {}
+            for issue in lintTree(root):
+                if issue.kind == 'ambiguous':
+                    key = (issue.path, frozenset(issue.nodes))
+                    reported.setdefault(key, []).append(issue.scope)
+            for scope in nodes:
+                paths = set()
+                for node in scope.yieldDescendants():
+                    for length in (1, 2):
+                        if length < node.getLevel():
+                            paths.add('.'.join(node.abs_path[-length:]))
+                for path in paths:
+                    try:
+                        scope.navigate(path)
+                    except AmbiguousPath as e:
+                        scopes = reported[path, frozenset(e.nodes)]
+                        self.assertTrue([s for s in scopes
+                            if self._isInSubtree(s, scope)])
+
+    def test_reader_locations(self):
+        """Issues show the lines of the tasks in PPL."""
+        prj = reader.Reader().readFromStream(StringIO("""Project 1
+Task DEV
+    A
+        TST
+    B
+        TST
+    TST
+"""))
+        issues = lintProject(prj)
+        self.assertEqual([(i.kind, str(i.scope), i.path) for i in issues],
+            [('shadowed', '.DEV', 'TST')])
+        self.assertEqual(str(issues[0]), 'TST in .DEV is shadowed by '
+            '.DEV.TST (<stream>:7): .DEV.A.TST (<stream>:4), '
+            '.DEV.B.TST (<stream>:6)')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Tests for the time-phased effort module model.phasing.
+"""
+
+import random
+import unittest
+import base
+
+from pmtk.model.phasing import TimePhasedEffort, _importNumpy
+from pmtk.model.project import Project
+
+
+class TestPhasing(unittest.TestCase):
+
+    use_numpy = False
+
+    def setUp(self):
+        self.p = Project('p')
+        self.p.addTask('a')
+        self.p.addTask('aa', parent='a')
+        self.p.addTask('ab', parent='a')
+        self.p.addTask('b')
+        self.p.addEstimate('.a.aa', 4)
+        self.p.addEstimate('.a.ab', 6)
+        self.p.addEstimate('.b', 3)
+        self.te = TimePhasedEffort(self.p, 5, use_numpy=self.use_numpy)
+
+    def _list(self, curve):
+        return [round(x, 6) for x in curve]
+
+    def test_intervals(self):
+        self.te.addInterval('.a.aa', 0, 2)
+        self.te.addInterval('.a.ab', 1, 4)
+        self.te.addInterval('.b', 4, 5)
+        self.assertEqual(self._list(self.te.getCurve('.a.aa')),
+                [2, 2, 0, 0, 0])
+        self.assertEqual(self._list(self.te.getCurve('.a')),
+                [2, 4, 2, 2, 0])
+        self.assertEqual(self._list(self.te.getCurve()), [2, 4, 2, 2, 3])
+        self.assertEqual(self._list(self.te.getCurve(cumulative=True)),
+                [2, 6, 8, 10, 13])
+        self.assertEqual(self._list(self.te.getBurndown()), [11, 7, 5, 3, 0])
+        self.assertEqual(self._list(self.te.getCurve('.b')),
+                [0, 0, 0, 0, 3])
+
+    def test_daily_effort(self):
+        self.te.setDailyEffort('.b', 1, [1, 1, 0, 2])
+        self.assertEqual(self.te.intervals[self.p.getTask('.b')],
+                [(1, 3, 1.0), (4, 5, 2.0)])
+        self.te.addInterval('.a', 0, 1, 5)
+        self.assertEqual(self._list(self.te.getCurve()), [5, 1, 1, 0, 2])
+        self.assertEqual(self._list(self.te.getCurve('.a.aa')), [0] * 5)
+
+    def test_invalid_interval(self):
+        self.assertRaises(ValueError, self.te.addInterval, '.b', 3, 3)
+        self.assertRaises(ValueError, self.te.addInterval, '.b', 3, 6)
+        self.assertRaises(ValueError, self.te.setDailyEffort, '.b', 3,
+                [1, 1, 1])
+
+    def test_curves(self):
+        self.te.addInterval('.a.aa', 0, 2)
+        self.te.addInterval('.b', 2, 5)
+        curves = self.te.getCurves(max_depth=1)
+        self.assertEqual(sorted(t.getAbsolutePath() for t in curves),
+                ['.', '.a', '.b'])
+        self.assertEqual(self._list(curves[self.p.getTask('.a')]),
+                [2, 2, 0, 0, 0])
+        self.assertEqual(len(self.te.getCurves()), 5)
+
+    def test_random_rollup(self):
+        """Subtree curves are the sums of the curves of the subtasks."""
+        rnd = random.Random(1)
+        p = Project('p')
+        tasks = [p.getRootTask()]
+        for i in range(200):
+            parent = rnd.choice(tasks).getAbsolutePath()
+            tasks.append(p.addTask('t%d' % i, parent=parent))
+        te = TimePhasedEffort(p, 30, use_numpy=self.use_numpy)
+        for task in tasks[1:]:
+            start = rnd.randrange(30)
+            te.addInterval(task.getAbsolutePath(), start,
+                    rnd.randrange(start + 1, 31), rnd.randrange(1, 20))
+        curves = te.getCurves()
+        for task in tasks:
+            expected = [0.0] * 30
+            for t in [task] + list(task.yieldDescendants()):
+                for start, end, rate in te.intervals.get(t, []):
+                    for day in range(start, end):
+                        expected[day] += rate
+            self.assertEqual(self._list(curves[task]), self._list(expected))
+
+    def test_tree_changes(self):
+        """The index follows the changes of the tree of tasks."""
+        self.te.addInterval('.b', 0, 3)
+        self.assertEqual(self._list(self.te.getCurve()), [1, 1, 1, 0, 0])
+        self.p.addTask('c')
+        self.assertEqual(self._list(self.te.getCurve('.c')), [0] * 5)
+        self.p.getTask('.b').moveTo(self.p.getTask('.a'))
+        self.assertEqual(self._list(self.te.getCurve('.a')), [1, 1, 1, 0, 0])
+        self.p.getTask('.a').removeChild('b')
+        self.assertEqual(self._list(self.te.getCurve()), [0] * 5)
+
+
+@unittest.skipIf(_importNumpy() is None, 'numpy is not installed')
+class TestPhasingNumpy(TestPhasing):
+
+    use_numpy = True
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests for the portfolio module model.portfolio.
+"""
+
+import unittest
+import base
+
+from pmtk.model.portfolio import Portfolio
+from pmtk.model.project import Project
+
+
+class TestPortfolio(unittest.TestCase):
+
+    def _build_project(self, id, owner):
+        prj = Project(''.join(id))  # make sure the id is not interned
+        dev = prj.addTask(''.join('DEV'), 'Development')
+        dev.setProperty(''.join('team'), owner)
+        prj.addTask('SETUP', parent='DEV')
+        prj.addTask('TST', parent='DEV')
+        doc = prj.addTask('DOC')
+        doc.setProperty('team', 'docs')
+        prj.addTask('TST', parent='DOC').setProperty('team', 'qa')
+        prj.addEstimate('.DEV.SETUP', 2)
+        prj.addEstimate('.DEV.TST', 3)
+        prj.addEstimate('.DOC.TST', 1)
+        return prj
+
+    def _build_portfolio(self):
+        pf = Portfolio('pf')
+        pf.addProject(self._build_project('p1', 'core'))
+        pf.addProject(self._build_project('p2', 'web'))
+        return pf
+
+    def test_interning(self):
+        pf = self._build_portfolio()
+        dev1 = pf.projects['p1'].getTask('DEV')
+        dev2 = pf.projects['p2'].getTask('DEV')
+        self.assertIs(dev1.id, dev2.id)
+        self.assertIs(dev1.title, dev2.title)
+        name1 = list(dev1.getProperties())[0]
+        name2 = list(dev2.getProperties())[0]
+        self.assertIs(name1, name2)
+        self.assertIs(pf.projects['p1'].getRootTask().children['DEV'], dev1)
+        tst = pf.projects['p2'].getTask('.DEV.TST')
+        self.assertIs(tst.abs_path[1], dev1.id)
+        self.assertIs(tst.abs_path[2], tst.id)
+        key = [k for k in dev2.children if k == 'SETUP'][0]
+        self.assertIs(key, dev1.children['SETUP'].id)
+        self.assertEqual(pf.title, 'pf')
+        pf.title = 'Portfolio'
+        self.assertEqual(pf.title, 'Portfolio')
+        self.assertRaises(ValueError, pf.addProject,
+                self._build_project('p1', 'x'))
+
+    def test_findTasks(self):
+        pf = self._build_portfolio()
+        found = sorted((p.id, t.getAbsolutePath())
+                for p, t in pf.findTasks('TST'))
+        self.assertEqual(found, [('p1', '.DEV.TST'), ('p1', '.DOC.TST'),
+            ('p2', '.DEV.TST'), ('p2', '.DOC.TST')])
+        found = sorted((p.id, t.getAbsolutePath())
+                for p, t in pf.findTasks('DEV.TST'))
+        self.assertEqual(found, [('p1', '.DEV.TST'), ('p2', '.DEV.TST')])
+        found = [(p.id, t.getAbsolutePath()) for p, t in pf.findTasks('.DOC')]
+        self.assertEqual(found, [('p1', '.DOC'), ('p2', '.DOC')])
+        self.assertEqual(pf.findTasks('NOPE'), [])
+
+    def test_effort(self):
+        pf = self._build_portfolio()
+        self.assertEqual(pf.getTotalEffort(), 12)
+        self.assertEqual(pf.getEffortByProperty('team'),
+            {'core': 5, 'web': 5, 'docs': 0, 'qa': 2})
+        self.assertEqual(pf.getEffortByProperty('nope'), {})
+
+    def test_locked(self):
+        """Projects with concurrency enabled can be added."""
+        prj = self._build_project('p1', 'core')
+        prj.enableConcurrency()
+        pf = Portfolio('pf')
+        pf.addProject(prj)
+        self.assertIs(prj.getTask('DEV').id, pf.intern('DEV'))
+
+    def test_reindex(self):
+        pf = self._build_portfolio()
+        pf.projects['p1'].addTask('TST')
+        self.assertEqual(len(pf.findTasks('TST')), 4)
+        pf.reindex()
+        self.assertEqual(len(pf.findTasks('TST')), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
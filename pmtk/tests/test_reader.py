@@ -2,6 +2,9 @@
 Tests for the ppl reader
 """
 
+import os
+import shutil
+import tempfile
 import unittest
 import base  # noqa (base imported and not used, but it's ok)
 
@@ -150,6 +153,18 @@ Task a
         except reader.SyntaxError:
             pass
 
+    def test_duplicate_task(self):
+        """Duplicate tasks -- must fail and report the line."""
+        try:
+            self._read_tasks("""
+Task a
+    b
+    b
+""")
+            raise AssertionError('SyntaxError expected')
+        except reader.SyntaxError as e:
+            self.assertTrue('.a.b (line 6)' in str(e), str(e))
+
     def test_task_description(self):
         """Task description loading."""
         a = self._read_task("""
@@ -211,5 +226,162 @@ Task a
         self.assertEqual(a.getProperty('prop3'), 'long property value')
 
 
+class TestEstimates(unittest.TestCase):
+    """Tests for the Estimates section."""
+
+    def _read_string(self, s):
+        return reader.Reader().readFromStream(StringIO.StringIO(s))
+
+    def test_estimates(self):
+        prj = self._read_string("""
+Project 1
+Task DOC
+    INFR
+    PPL
+Task DEV
+    DATA
+    PARS
+    COMP
+Estimates
+    DOC
+        INFR: 30m
+        PPL: 8h
+    DEV
+        DATA, PARS: 2d -- estimating multiple tasks at once
+    COMP: 4h 30m
+""")
+        self.assertEqual(prj.getTaskEffort('.DOC'), 8.5)
+        self.assertEqual(prj.getTaskEffort('.DEV.PARS'), 16)
+        self.assertEqual(prj.getTaskEffort('.DEV'), 36.5)
+
+    def test_duration(self):
+        self.assertEqual(reader.parseDuration('1w 1d 1h'), 49)
+        self.assertEqual(reader.parseDuration(' 3'), 3)
+        self.assertEqual(reader.parseDuration('90m'), 1.5)
+        self.assertRaises(reader.SyntaxError, reader.parseDuration, '')
+        self.assertRaises(reader.SyntaxError, reader.parseDuration, 'xh')
+
+    def test_unknown_task(self):
+        self.assertRaises(reader.UnknownTask, self._read_string,
+                'Project 1\nTask a\nEstimates\n    b: 1h\n')
+        self.assertRaises(reader.SyntaxError, self._read_string,
+                'Project 1\nEstimates 1\n')
+
+
+class TestInclude(unittest.TestCase):
+    """Tests for the Include command."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = reader.IncludeCache()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def _read(self, name):
+        rdr = reader.Reader(self.cache)
+        return rdr.readFromFile(os.path.join(self.dir, name))
+
+    def test_include(self):
+        """Included tasks are grafted under the context."""
+        self._write('release.ppl', """
+Task REL "Release"
+    $owner qa
+    "Release checklist"
+    TAG "Tag the release"
+""")
+        self._write('main.ppl', """
+Project 1
+Task a
+    Include release.ppl
+    b
+Include "release.ppl"
+""")
+        prj = self._read('main.ppl')
+        self.assertEqual(prj.getTask('.a.REL.TAG').title, 'Tag the release')
+        self.assertEqual(prj.getTask('.a.b').title, 'b')
+        rel = prj.getTask('.REL')
+        self.assertEqual(rel.description, 'Release checklist')
+        self.assertEqual(rel.getProperty('owner'), 'qa')
+        self.assertIsNot(rel, prj.getTask('.a.REL'))
+
+    def test_include_cached(self):
+        """Included file is parsed once and reparsed when it changes."""
+        self._write('sub.ppl', 'Task s\n')
+        self._write('inc.ppl', 'Task i\n    Include sub.ppl\n')
+        self._write('main.ppl', 'Project 1\nTask a\n    Include inc.ppl\n'
+                'Task b\n    Include inc.ppl\n')
+        prj = self._read('main.ppl')
+        self.assertEqual(prj.getTask('.b.i.s').id, 's')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+        self._write('sub.ppl', 'Task t\n')
+        prj = self._read('main.ppl')
+        self.assertEqual(prj.getTask('.a.i.t').id, 't')
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 4))
+        self._write('inc.ppl', 'Task j\n    Include sub.ppl\n')
+        prj = self._read('main.ppl')
+        self.assertEqual(prj.getTask('.a.j.t').id, 't')
+        self.assertEqual(len(self.cache.entries), 2)  # old versions dropped
+
+    def test_include_cycle(self):
+        """Circular includes are detected and the chain is reported."""
+        self._write('a.ppl', 'Task a\n    Include b.ppl\n')
+        self._write('b.ppl', 'Task b\n    Include a.ppl\n')
+        self._write('main.ppl', 'Project 1\n\nInclude a.ppl\n')
+        try:
+            self._read('main.ppl')
+            raise AssertionError('IncludeError expected')
+        except reader.IncludeError as e:
+            self.assertEqual([(os.path.basename(f), n) for f, n in e.chain],
+                [('main.ppl', 3), ('a.ppl', 2), ('b.ppl', 2)])
+
+    def test_include_error(self):
+        """Errors in included files are reported with the include chain."""
+        self._write('bad.ppl', 'Task a\n    Task\n')
+        self._write('main.ppl', 'Project 1\nInclude bad.ppl\n')
+        try:
+            self._read('main.ppl')
+            raise AssertionError('IncludeError expected')
+        except reader.IncludeError as e:
+            self.assertTrue('bad.ppl:2' in str(e))
+            self.assertTrue('main.ppl:2' in str(e))
+
+    def test_include_duplicates(self):
+        """Duplicate ids in or around included files have the chain."""
+        self._write('dup.ppl', 'Task a\n    b\n    b\n')
+        self._write('main.ppl', 'Project 1\nTask x\n    Include dup.ppl\n')
+        try:
+            self._read('main.ppl')
+            raise AssertionError('IncludeError expected')
+        except reader.IncludeError as e:
+            self.assertTrue('dup.ppl' in str(e))
+            self.assertTrue('main.ppl:3' in str(e))
+        self._write('one.ppl', 'Task a\n')
+        self._write('main.ppl', 'Project 1\nTask a\nInclude one.ppl\n')
+        try:
+            self._read('main.ppl')
+            raise AssertionError('IncludeError expected')
+        except reader.IncludeError as e:
+            self.assertTrue('Duplicate child id: .a' in str(e))
+            self.assertTrue('main.ppl:3' in str(e))
+
+    def test_include_missing(self):
+        """Missing included file."""
+        self._write('main.ppl', 'Project 1\nInclude nothere.ppl\n')
+        self.assertRaises(reader.IncludeError, self._read, 'main.ppl')
+
+    def test_include_project(self):
+        """Included file can't contain Project command."""
+        self._write('prj.ppl', 'Project 2\n')
+        self._write('main.ppl', 'Project 1\nInclude prj.ppl\n')
+        self.assertRaises(reader.IncludeError, self._read, 'main.ppl')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+"""
+Tests for the plan server
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import base
+
+from pmtk import server
+
+
+class TestServer(unittest.TestCase):
+    """Test the queries to the plan server over the socket."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ppl = os.path.join(self.dir, 'plan.ppl')
+        self._write('Project P\nTask a\n    b\n    c\nEstimates\n    b: 3h\n')
+        self.store = server.ProjectStore([self.ppl])
+        socket_path = os.path.join(self.dir, 'pmtk.sock')
+        self.server = server.PlanServer(socket_path, self.store)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.client = server.Client(socket_path)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.dir)
+
+    def _write(self, text):
+        with open(self.ppl, 'w') as f:
+            f.write(text)
+
+    def test_queries(self):
+        q = self.client.query
+        self.assertEqual(q('projects'), ['P\t' + self.ppl])
+        self.assertEqual(q('task P b'), ['.a.b\tb'])
+        self.assertEqual(q('effort P a'), ['3'])
+        self.assertEqual(sorted(q('descendants P .')), ['.a', '.a.b', '.a.c'])
+
+    def test_errors(self):
+        q = self.client.query
+        self.assertRaises(server.QueryError, q, 'task X a')
+        self.assertRaises(server.QueryError, q, 'task P z')
+        self.assertRaises(server.QueryError, q, 'task P')
+        self.assertRaises(server.QueryError, q, 'task P a b')
+        self.assertRaises(server.QueryError, q, 'projects P')
+        self.assertRaises(server.QueryError, q, 'frobnicate')
+        self.assertEqual(q('task P a'), ['.a\ta'])  # still works
+
+    def test_reload(self):
+        """Changed files are re-parsed, broken files keep the old project."""
+        project = self.store.getProject('P')
+        self.assertIs(self.store.getProject('P'), project)
+        self._write('Project P\nTask a "New title"\nEstimates\n    a: 1d\n')
+        self.assertEqual(self.client.query('task P a'), ['.a\tNew title'])
+        self.assertEqual(self.client.query('effort P a'), ['8'])
+        self._write('Project P\nTask\n')
+        self.assertEqual(self.client.query('task P a'), ['.a\tNew title'])
+        self.assertEqual(len(self.client.query('projects')[0].split('\t')),
+            3)
+
+
+if __name__ == '__main__':
+    unittest.main()
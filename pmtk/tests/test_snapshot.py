@@ -0,0 +1,131 @@
+"""
+Tests for the copy-on-write snapshots module model.snapshot.
+"""
+
+import unittest
+import base
+
+from pmtk.model.project import Project
+from pmtk.model.snapshot import Snapshot, ChildMap, _Trie
+from pmtk.model.tree import NonexistentPath
+from pmtk.model.work import Task
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test snapshot changes and structural sharing."""
+
+    def _build_snapshot(self):
+        root = Task()
+        a = Task('a', 'A', root)
+        a.description = 'Task a'
+        ab = Task('b', None, a)
+        ab.setProperty('owner', 'me')
+        Task('c', None, a)
+        b = Task('b', None, root)
+        Task('d', None, b)
+        return Snapshot.fromTask(root, {'.a.b': 3, '.a.c': 2, '.b.d': 5})
+
+    def test_fromTask(self):
+        s = self._build_snapshot()
+        self.assertEqual(s.getState('.a').title, 'A')
+        self.assertEqual(s.getState('.a').description, 'Task a')
+        self.assertEqual(s.getState('.a.b').properties, {'owner': 'me'})
+        self.assertEqual(s.getEffort(), 10)
+        self.assertEqual(s.getEffort('.a'), 5)
+        self.assertRaises(NonexistentPath, s.getState, '.a.d')
+
+    def test_toTask(self):
+        root = self._build_snapshot().toTask()
+        self.assertEqual(root.navigate('d').getAbsolutePath(), '.b.d')
+        self.assertEqual(root.navigate('a.b').getProperty('owner'), 'me')
+        self.assertEqual(root.navigate('.a').description, 'Task a')
+
+    def test_sharing(self):
+        """Changes copy only the path to the changed task."""
+        s1 = self._build_snapshot()
+        s2 = s1.setEstimate('.a.b', 10)
+        self.assertEqual(s1.getEffort(), 10)
+        self.assertEqual(s2.getEffort(), 17)
+        self.assertIsNot(s1.root, s2.root)
+        self.assertIsNot(s1.getState('.a'), s2.getState('.a'))
+        self.assertIs(s1.getState('.a.c'), s2.getState('.a.c'))
+        self.assertIs(s1.getState('.b'), s2.getState('.b'))
+
+    def test_addTask(self):
+        s1 = self._build_snapshot()
+        s2 = s1.addTask('.b.e', 'E', estimate=1)
+        self.assertFalse(s1.hasTask('.b.e'))
+        self.assertEqual(s2.getState('.b.e').title, 'E')
+        self.assertEqual(s2.getEffort('.b'), 6)
+        self.assertRaises(ValueError, s2.addTask, '.b.e')
+        self.assertRaises(NonexistentPath, s2.addTask, '.x.y')
+
+    def test_updateTask(self):
+        s1 = self._build_snapshot()
+        s2 = s1.updateTask('.a', title='New A').setProperty('.a', 'x', 1)
+        self.assertEqual(s1.getState('.a').title, 'A')
+        self.assertEqual(s2.getState('.a').title, 'New A')
+        self.assertEqual(s2.getState('.a').properties, {'x': 1})
+        self.assertRaises(ValueError, s1.updateTask, '.a', id='z')
+        props = {'y': 2}
+        s3 = s1.updateTask('.a', properties=props)
+        props['y'] = 3
+        self.assertEqual(s3.getState('.a').properties, {'y': 2})
+
+    def _buckets(self, node):
+        if isinstance(node, _Trie):
+            return [b for child in node.slots.values()
+                    for b in self._buckets(child)]
+        return [node]
+
+    def test_childMap(self):
+        """Wide maps keep order and share all but the changed bucket."""
+        m1 = ChildMap(('t%d' % i, i) for i in range(1000))
+        self.assertEqual(m1.keys()[:3], ['t0', 't1', 't2'])
+        self.assertEqual(len(m1), 1000)
+        m2 = m1.set('t5', 'x').set('new', 'y').remove('t0')
+        self.assertEqual((m1['t5'], m2['t5'], m2['new']), (5, 'x', 'y'))
+        self.assertEqual(m2.keys()[:2], ['t1', 't2'])
+        self.assertEqual(m2.keys()[-1], 'new')
+        self.assertTrue('t0' in m1)
+        self.assertFalse('t0' in m2)
+        self.assertEqual(len(m2), 1000)
+        self.assertRaises(KeyError, m2.remove, 't0')
+        old = set(id(b) for b in self._buckets(m1._root))
+        new = [b for b in self._buckets(m1.set('t7', 0)._root)
+                if id(b) not in old]
+        self.assertEqual(len(new), 1)
+
+    def test_removeTask(self):
+        s1 = self._build_snapshot()
+        s2 = s1.removeTask('.a.b')
+        self.assertTrue(s1.hasTask('.a.b'))
+        self.assertFalse(s2.hasTask('.a.b'))
+        self.assertEqual(s2.getEffort(), 7)
+
+    def test_moveTask(self):
+        s1 = self._build_snapshot()
+        s2 = s1.moveTask('.a.c', '.b')
+        self.assertIs(s2.getState('.b.c'), s1.getState('.a.c'))
+        self.assertFalse(s2.hasTask('.a.c'))
+        self.assertEqual(s2.getEffort('.b'), 7)
+        self.assertRaises(ValueError, s2.moveTask, '.b', '.b.d')
+        self.assertRaises(ValueError, s2.moveTask, '.a.b', '.')
+
+    def test_fromProject(self):
+        """Estimates of moved and removed tasks are handled."""
+        p = Project('p')
+        p.addTask('a')
+        p.addTask('b', parent='a')
+        p.addTask('c', parent='a')
+        p.addEstimate('.a.b', 3)
+        p.addEstimate('.a.c', 2)
+        p.getTask('.a.b').moveTo(p.getRootTask())
+        p.getTask('.a.c').detach()
+        s = Snapshot.fromProject(p)
+        self.assertEqual(s.getState('.b').estimate, 3)
+        self.assertEqual(s.getEffort(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,10 +2,14 @@
 Tests for the tree building module model.tree.
 """
 
+import gc
 import unittest
+import weakref
 import base
+import fuzz_navigation
 
-from pmtk.model.tree import Node, NonexistentPath, AmbiguousPath
+from pmtk.model.tree import Node, NonexistentPath, AmbiguousPath,\
+        navigation_cache
 
 
 class Record(object):
@@ -100,6 +104,132 @@ class TestNode(unittest.TestCase):
         self.assertItemsEqual(list(T.root.yieldDescendants()),
             [v for (k,v) in T.__dict__.items() if k[0] in ('a', 'b')])
 
+    def test_outlineNumbers(self):
+        """Children keep insertion order and outline numbers follow it."""
+        T = self._build_tree()
+        self.assertEqual(list(T.ac.listChildren()), [T.aca, T.acd, T.ace])
+        self.assertEqual(T.root.getOutlineNumber(), '')
+        self.assertEqual(T.aced.getOutlineNumber(), '1.2.3.1')
+        self.assertIs(T.root.navigateOutline('1.2.3.1'), T.aced)
+        self.assertIs(T.ac.navigateOutline('2'), T.acd)
+        self.assertIs(T.ac.navigateOutline(''), T.ac)
+        for number in ('1.3', '0', '2.1.3', 'x'):
+            self.assertRaises(NonexistentPath, T.root.navigateOutline, number)
+        T.ac.removeChild('a')
+        self.assertEqual(T.aced.getOutlineNumber(), '1.2.2.1')
+        T.ab.moveTo(T.bcf)
+        self.assertEqual(T.ac.getOutlineNumber(), '1.1')
+        self.assertEqual(T.abed.getOutlineNumber(), '2.1.2.1.1.1')
+        T.bcd.moveTo(T.a)
+        self.assertEqual([n.getOutlineNumber() for n in T.a.listChildren()],
+                ['1.1', '1.2'])
+        self.assertEqual(T.bcf.getOutlineNumber(), '2.1.1')
+
+    def test_removeChild(self):
+        T = self._build_tree()
+        self.assertIs(T.a.removeChild('c'), T.ac)
+        self.assertEqual(T.a.children, {'b': T.ab})
+        self.assertIs(T.ac.parent, None)
+        self.assertEqual(T.aced.getAbsolutePath(), '.e.d')
+        self.assertEqual(T.root.navigate('d'), T.bcd)
+        self.assertRaises(ValueError, T.a.removeChild, T.bc)
+        self.assertRaises(ValueError, T.a.removeChild, 'missing')
+        T.bc.detach()
+        T.bc.detach()
+        self.assertEqual(T.b.children, {})
+
+    def test_moveTo(self):
+        T = self._build_tree()
+        self.assertRaises(AmbiguousPath, T.bcf.navigate, 'e.d')
+        T.ac.moveTo(T.bcf)
+        self.assertEqual(T.aced.getAbsolutePath(), '.b.c.f.c.e.d')
+        self.assertEqual(T.bcf.children, {'c': T.ac})
+        self.assertEqual(T.a.children, {'b': T.ab})
+        self.assertEqual(T.bcf.navigate('e.d'), T.aced)
+        self.assertEqual(T.root.navigate('e.d'), T.abed)
+        self.assertEqual(T.aced.getLevel(), 7)
+        T.ac.moveTo(T.a)
+        self.assertEqual(T.aced.getAbsolutePath(), '.a.c.e.d')
+        self.assertEqual(T.bcf.navigate('c.e'), T.ace)
+        self.assertRaises(ValueError, T.ac.moveTo, T.aced)  # under itself
+        self.assertRaises(ValueError, T.ac.moveTo, T.ac)
+        self.assertRaises(ValueError, T.bc.moveTo, T.a)  # duplicate id
+        self.assertEqual(T.bc.getAbsolutePath(), '.b.c')
+        self.assertRaises(ValueError, T.a.addChild, T.bc)  # has parent
+        T.bc.moveTo(T.b)  # to the same parent
+        self.assertEqual(T.bc.getAbsolutePath(), '.b.c')
+        # paths outside of the moved subtree keep their tuples
+        path = T.bcd.abs_path
+        T.ace.moveTo(T.root)
+        self.assertEqual(T.aced.abs_path, ('', 'e', 'd'))
+        self.assertIs(T.bcd.abs_path, path)
+
+    def test_navigationCache(self):
+        """Cached results are reused until their SCST changes."""
+        T = self._build_tree()
+        navigation_cache.clear()
+
+        def stats():
+            s = navigation_cache.getStats()
+            return s['hits'], s['misses']
+
+        self.assertEqual(T.ace.navigate('d'), T.aced)
+        self.assertEqual(T.bcf.navigate('c.d'), T.bcd)
+        self.assertRaises(NonexistentPath, T.bcf.navigate, 'z')
+        self.assertRaises(AmbiguousPath, T.bcf.navigate, 'e.d')
+        self.assertEqual(stats(), (0, 4))
+        self.assertEqual(T.ace.navigate('d'), T.aced)
+        self.assertEqual(T.bcf.navigate('c.d'), T.bcd)
+        self.assertRaises(NonexistentPath, T.bcf.navigate, 'z')
+        try:
+            T.bcf.navigate('e.d')
+        except AmbiguousPath as e:
+            self.assertEqual(e.nodes, [T.abed, T.aced])
+        self.assertEqual(stats(), (4, 4))
+
+        # Change outside of the SCST of .b.c.f and .b.c.d
+        Node('x', T.ab)
+        self.assertEqual(T.bcf.navigate('c.d'), T.bcd)
+        self.assertEqual(stats(), (5, 4))
+        # ... but inside of the tree where z was not found
+        z = Node('z', T.ab)
+        self.assertEqual(T.bcf.navigate('z'), z)
+        self.assertEqual(stats(), (5, 5))
+        # Change in the SCST of .a.c.e and .a.c.e.d
+        aced2 = Node('d', Node('y', T.ace))
+        self.assertEqual(T.ace.navigate('d'), T.aced)
+        self.assertEqual(stats(), (5, 6))
+        self.assertEqual(aced2.navigate('d'), aced2)
+
+    def test_navigationCacheRelease(self):
+        """The cache doesn't keep discarded trees alive."""
+        T = self._build_tree()
+        navigation_cache.clear()
+        self.assertEqual(T.ace.navigate('d'), T.aced)
+        self.assertRaises(AmbiguousPath, T.bcf.navigate, 'e.d')
+        self.assertRaises(NonexistentPath, T.bcf.navigate, 'z')
+        root = weakref.ref(T.root)
+        del T
+        gc.collect()
+        self.assertIs(root(), None)
+
+    def test_navigationFuzz(self):
+        """Cached navigation agrees with the reference on random trees."""
+        for seed in range(5):
+            fuzz_navigation.run(seed, rounds=20, size=100, queries=100)
+
+    def test_hashes(self):
+        """Equal subtrees have equal hashes, changes update the ancestors."""
+        T = self._build_tree()
+        self.assertEqual(T.abe.getHash(), T.ace.getHash())
+        self.assertNotEqual(T.ab.getHash(), T.ac.getHash())
+        root_hash = T.root.getHash()
+        b_hash = T.b.getHash()
+        Node('x', T.abed)
+        self.assertNotEqual(T.abe.getHash(), T.ace.getHash())
+        self.assertNotEqual(T.root.getHash(), root_hash)
+        self.assertEqual(T.b.getHash(), b_hash)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,58 @@
+"""
+Tests for the utility module.
+"""
+
+import threading
+import time
+import unittest
+import base
+
+from pmtk.util import RWLock
+
+
+class TestRWLock(unittest.TestCase):
+    """Test the reader-writer lock."""
+
+    def test_reentrant(self):
+        lock = RWLock()
+        with lock.writing():
+            with lock.writing():
+                with lock.reading():
+                    pass
+        with lock.reading():
+            with lock.reading():
+                self.assertRaises(RuntimeError, lock.acquireWrite)
+        with lock.writing():
+            pass
+
+    def test_exclusion(self):
+        """Writer waits for the readers and the readers wait for the writer.
+        """
+        lock = RWLock()
+        events = []
+
+        def write():
+            with lock.writing():
+                events.append('write')
+
+        def read():
+            with lock.reading():
+                events.append('read')
+
+        lock.acquireRead()
+        writer = threading.Thread(target=write)
+        writer.start()
+        while not lock._waiting_writers:
+            time.sleep(0.001)
+        reader = threading.Thread(target=read)  # must wait for the writer
+        reader.start()
+        time.sleep(0.01)
+        events.append('release')
+        lock.releaseRead()
+        writer.join()
+        reader.join()
+        self.assertEqual(events, ['release', 'write', 'read'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 Tests for the work breakdown module model.work.
 """
 
+import threading
 import unittest
 import base
 
@@ -59,6 +60,75 @@ class TestWorkBreakdownBuilder(unittest.TestCase):
         for task in wb.getRootTask().yieldDescendants():
             self.assertEqual(task.title, task.getAbsolutePath())
 
+    def test_bulk(self):
+        """Tasks added in bulk mode are in the tree when the mode ends."""
+        wb = TestWB()
+        wbb = WorkBreakdownBuilder(wb)
+        with wbb.bulk():
+            wbb.setContext(wbb.addTask('a', '.a'))
+            wbb.setContext(wbb.addTask('b', '.a.b'))
+            wbb.addTask('c', '.a.b.c')
+            self.assertEqual(wb.getRootTask().children, {})
+            wbb.popContext()
+            wbb.addTask('b.d', '.a.b.d')  # navigation adds pending tasks
+            wbb.addTask('e', '.a.e')
+        for task in wb.getRootTask().yieldDescendants():
+            self.assertEqual(task.title, task.getAbsolutePath())
+        self.assertEqual(len(list(wb.getRootTask().yieldDescendants())), 5)
+        self.assertEqual(wb.getTaskByOutline('1.1.2').getAbsolutePath(),
+                '.a.b.d')
+        self.assertEqual(wb.getTaskByOutline('1.2').getOutlineNumber(), '1.2')
+
+    def test_bulk_duplicates(self):
+        """Duplicates are reported at the end of bulk mode."""
+        wb = TestWB()
+        wbb = WorkBreakdownBuilder(wb)
+        try:
+            with wbb.bulk():
+                wbb.addTask('a', None)
+                wbb.setContext(wbb.addTask('a', None))
+                wbb.addTask('b', None)
+                wbb.addTask('c', None)
+                wbb.popContext()
+                wbb.addTask('c', None)
+                wbb.addTask('c', None)
+            raise AssertionError('ValueError expected')
+        except ValueError as e:
+            self.assertEqual(str(e), 'Duplicate child id: .a, .c')
+        self.assertEqual(sorted(wb.getRootTask().children), ['a', 'c'])
+        self.assertEqual(wb.getTask('.a').children, {})
+
+    def test_concurrent_batches(self):
+        """Readers see either all or none of the tasks added in a batch."""
+        wb = TestWB()
+        wb.enableConcurrency()
+        wbb = WorkBreakdownBuilder(wb)
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                with wb.reading():
+                    for batch in wb.getRootTask().listChildren():
+                        if len(batch.listChildren()) != 10:
+                            errors.append(batch.getAbsolutePath())
+
+        readers = [threading.Thread(target=read) for i in range(4)]
+        for reader in readers:
+            reader.start()
+        for i in range(50):
+            with wbb.batch():
+                wbb.setContext(wbb.addTask('b%d' % i, None))
+                for j in range(10):
+                    wbb.addTask('t%d' % j, None)
+                wbb.popContext()
+        done.set()
+        for reader in readers:
+            reader.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(wb.getRootTask().listChildren()), 50)
+        self.assertEqual(wb.getTask('b7.t3').getAbsolutePath(), '.b7.t3')
+
 
 if __name__ == '__main__':
     unittest.main()
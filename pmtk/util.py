@@ -2,21 +2,37 @@
 Utility classes and functions
 """
 
+import contextlib
+import threading
+
 
 class TitleMixin:
     """Mixin class for having a title that defaults to id and a description"""
 
-    description = ''
+    __description = ''
     __properties = {}
 
+    def _contentChanged(self):
+        """Called when title, description or properties change."""
+
     def __getTitle(self):
         return self.__title if self.__title is not None else self.id
 
     def __setTitle(self, title):
         self.__title = title
+        self._contentChanged()
 
     title = property(__getTitle, __setTitle)
 
+    def __getDescription(self):
+        return self.__description
+
+    def __setDescription(self, description):
+        self.__description = description
+        self._contentChanged()
+
+    description = property(__getDescription, __setDescription)
+
     def setProperty(self, id, value):
         self.setProperties(**{id: value})
 
@@ -26,7 +42,123 @@ class TitleMixin:
             self.__properties = dict(kw)
         else:
             self.__properties.update(kw)
+        self._contentChanged()
 
     def getProperty(self, id, default=None):
         """Return property value or None."""
         return self.__properties.get(id, default)
+
+    def getProperties(self):
+        """Return a dictionary of all custom properties."""
+        return dict(self.__properties)
+
+    def internStrings(self, intern):
+        """Replace title and property names and values with interned copies.
+
+        intern is a function that returns the shared copy of a string.
+        """
+        if self.__title is not None:
+            self.__title = intern(self.__title)
+        if self.__properties:
+            self.__properties = dict((intern(k), intern(v)
+                if isinstance(v, str) else v)
+                for k, v in self.__properties.items())
+
+
+class RWLock(object):
+    """Reader-writer lock: many readers or one writer at a time.
+
+    Waiting writers are preferred over new readers. Both locks are reentrant
+    and the thread that holds the write lock can also acquire the read lock
+    (but not the other way around).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = {}  # read lock depth by thread
+        self._writer = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+
+    def acquireRead(self):
+        me = threading.current_thread()
+        with self._cond:
+            if self._writer is me:
+                self._write_depth += 1
+            elif me in self._readers:
+                self._readers[me] += 1
+            else:
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+                self._readers[me] = 1
+
+    def releaseRead(self):
+        me = threading.current_thread()
+        with self._cond:
+            if self._writer is me:
+                self._write_depth -= 1
+            else:
+                self._readers[me] -= 1
+                if not self._readers[me]:
+                    del self._readers[me]
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    def acquireWrite(self):
+        me = threading.current_thread()
+        with self._cond:
+            if self._writer is me:
+                self._write_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("Can't upgrade read lock to write lock")
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def releaseWrite(self):
+        with self._cond:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def reading(self):
+        self.acquireRead()
+        try:
+            yield
+        finally:
+            self.releaseRead()
+
+    @contextlib.contextmanager
+    def writing(self):
+        self.acquireWrite()
+        try:
+            yield
+        finally:
+            self.releaseWrite()
+
+
+class _NullContext(object):
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class NullLock(object):
+    """Stand-in for RWLock that doesn't lock anything."""
+
+    _context = _NullContext()
+
+    def reading(self):
+        return self._context
+
+    def writing(self):
+        return self._context
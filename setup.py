@@ -17,6 +17,7 @@ setup(name='ppl',
       include_package_data=True,
       zip_safe=False,
       install_requires=['setuptools'],
+      entry_points={'console_scripts': ['pmtk = pmtk.cli:main']},
       keywords='Project Management Toolkit',
       url='https://github.com/kvas-it/pmtk',
       namespace_packages=['pmtk'])